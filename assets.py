@@ -0,0 +1,179 @@
+"""
+Wspólny bufor zasobów (mapy, czcionki, pliki JSON i .feat z warstwami)
+używany przez main.py, radar.py i renderery sekcji. Wpis jest unieważniany,
+gdy zmieni się czas modyfikacji lub rozmiar pliku, więc kolejne renderowanie
+z tymi samymi plikami nie dekoduje ich ponownie. Moduł nie importuje PyQt6.
+"""
+import os
+import json
+import threading
+from PIL import Image, ImageFont
+
+
+def file_signature(path):
+    """Zwraca (mtime_ns, rozmiar) pliku albo None, jeśli plik nie istnieje."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class AssetCache:
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, path, loader, release=None):
+        """
+        Zwraca wartość zapamiętaną pod `key`, o ile plik `path` się nie zmienił;
+        w przeciwnym razie wywołuje `loader()` i zapamiętuje wynik. `release(wartość)`
+        jest wywoływane, gdy wpis zostaje zastąpiony lub usunięty (np. zamknięcie
+        pliku mapowanego w pamięci).
+        """
+        signature = file_signature(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature and signature is not None:
+                return entry[1]
+
+        value = loader()
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = (signature, value, release)
+        if previous is not None and previous[1] is not value:
+            release_entry(previous)
+        return value
+
+    def discard(self, key):
+        """Usuwa wpis `key` (jeśli jest) i zwalnia jego wartość."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            release_entry(entry)
+
+    def clear(self):
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            release_entry(entry)
+
+
+def release_entry(entry):
+    _, value, release = entry
+    if release is not None:
+        release(value)
+
+
+cache = AssetCache()
+
+
+# Image.MAX_IMAGE_PIXELS jest globalne dla całego procesu, więc każde otwarcie
+# obrazu (także z limitem) idzie przez tę blokadę - inaczej równoległe wątki
+# (GUI, podgląd, usługa) mogłyby zostawić limit wyłączony albo włączyć go w trakcie
+_open_lock = threading.Lock()
+
+
+def open_image(path, trusted=False):
+    """
+    Otwiera obraz (Image.open - czyta nagłówek, piksele są dekodowane przy
+    pierwszym użyciu). Dla `trusted` (mapy bazowe - nasz plik, nie atak)
+    bez limitu rozmiaru PIL chroniącego przed "bombami dekompresyjnymi".
+    """
+    with _open_lock:
+        if not trusted:
+            return Image.open(path)
+        max_pixels = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            return Image.open(path)
+        finally:
+            Image.MAX_IMAGE_PIXELS = max_pixels
+
+
+def load_image(path, mode="RGBA", trusted=False):
+    """
+    Zwraca zdekodowany obraz w trybie `mode`. Obraz jest współdzielony między
+    wywołaniami - przed rysowaniem należy zrobić kopię (`.copy()`).
+    """
+    def loader():
+        with open_image(path, trusted) as image:
+            return image.convert(mode)
+    return cache.get(("image", path, mode), path, loader)
+
+
+def load_map(path):
+    """
+    Zwraca zdekodowaną mapę bazową (RGBA) jak load_image, ale bez limitu
+    rozmiaru PIL - mapy 16k px go przekraczają. Wszystkie miejsca wczytujące
+    mapę (eksport, podgląd, radar.py, benchmarki) używają tej funkcji.
+    """
+    return load_image(path, trusted=True)
+
+
+def image_size(path):
+    """
+    (szerokość, wysokość) obrazu odczytane z nagłówka, bez dekodowania pikseli,
+    albo None, gdy pliku nie da się otworzyć.
+    """
+    def loader():
+        try:
+            with open_image(path, trusted=True) as image:
+                return image.size
+        except OSError:
+            return None
+    return cache.get(("size", path), path, loader)
+
+
+def load_font(path, size):
+    """Wczytuje czcionkę TrueType, a gdy to niemożliwe - domyślną czcionkę PIL."""
+    def loader():
+        try:
+            if not os.path.exists(path):
+                return ImageFont.load_default()
+            return ImageFont.truetype(path, size)
+        except Exception:
+            return ImageFont.load_default()
+    return cache.get(("font", path, size), path, loader)
+
+
+def load_json(path):
+    """Zwraca sparsowaną zawartość pliku JSON. Wynik jest współdzielony - nie modyfikować."""
+    def loader():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return cache.get(("json", path), path, loader)
+
+
+def load_features(path):
+    """
+    Zwraca obiekty warstwy z pliku `path`: z pliku .feat (renderers.feature_file,
+    mapowany w pamięci) albo z pliku JSON (lista słowników). Oba wyniki można
+    iterować i indeksować. Wynik jest współdzielony - nie modyfikować.
+    """
+    from renderers.feature_file import FEATURE_EXTENSION, FeatureFile
+    if not path.lower().endswith(FEATURE_EXTENSION):
+        return load_json(path)
+    return cache.get(("features", path), path, lambda: FeatureFile(path), release=FeatureFile.close)
+
+
+def release_features(path):
+    """
+    Zamyka wczytany plik .feat `path` (mapowanie w pamięci). W Windows pliku
+    zmapowanego w pamięci nie da się podmienić, więc trzeba to zrobić przed
+    zapisem nowej wersji.
+    """
+    cache.discard(("features", path))
+
+
+def load_thumbnail(path, max_side):
+    """
+    Zwraca pomniejszoną kopię mapy (RGBA) mieszczącą się w kwadracie
+    `max_side` x `max_side`. Wynik jest współdzielony - nie modyfikować.
+    """
+    def loader():
+        thumbnail = load_map(path).copy()
+        thumbnail.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        return thumbnail
+    return cache.get(("thumbnail", path, max_side), path, loader)
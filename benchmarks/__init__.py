@@ -0,0 +1 @@
+"""Benchmarki renderowania map - uruchamiane przez `python -m benchmarks.run`."""
@@ -0,0 +1,416 @@
+"""
+Benchmarki renderowania na syntetycznych danych: renderowanie każdej sekcji,
+składanie podpisów z atlasu znaków (sprawdzane z ImageDraw.text),
+rozmieszczanie podpisów (także na gęstej mapie), łatanie mapy w trybie
+obserwowania plików (sprawdzane z renderowaniem całej mapy), pełny eksport (zwykły i kafelkami), odświeżanie widoku mapy w radar.py
+(Qt bez ekranu) i zimny start okna main.py. Wyniki można zapisać jako punkt odniesienia i porównywać
+z nim kolejne zmiany:
+
+    python -m benchmarks.run --save-baseline main
+    python -m benchmarks.run --compare main
+
+Dane (mapy 1k-16k px, warstwy 10-100k wpisów) powstają przy pierwszym
+uruchomieniu w benchmarks/data/.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import shutil
+import argparse
+import subprocess
+import datetime
+import statistics
+from PIL import Image, ImageChops, ImageDraw
+import PIL
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import assets
+from renderers import (CoverageRenderer, CoverageSettings, DistrictsRenderer, DistrictsSettings, RenderJob,
+                       SpeedCamerasRenderer, SpeedCamerasSettings, render_map)
+from renderers import features
+from renderers.base import Viewport
+from renderers.districts import layout_name, wrap_name
+from renderers.export import DEFAULT_PROFILE, export_image
+from renderers.pipeline import compose, solve_labels
+from renderers.profiling import RenderReport
+from renderers.speed_cameras import speed_bbox, tinted_icon
+from renderers.text import draw_text, glyph_masks, text_stamp
+from renderers.tiled import render_tiled
+from renderers.watch import MapWatcher
+from benchmarks.synthetic import SPEEDS, districts_path, map_path, speed_cameras_path
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCHMARKS_DIR, "data")
+BASELINE_DIR = os.path.join(BENCHMARKS_DIR, "baselines")
+
+DEFAULT_SIZES = (1024, 4096)
+DEFAULT_COUNTS = (10, 1000, 10000)
+DEFAULT_REPEAT = 3
+SUITES = ("sections", "text", "labels", "watch", "export", "radar", "startup")
+
+# Rozmiar podglądu w main.py (preview.PREVIEW_SIZE - bez importowania PyQt6)
+WATCH_PREVIEW_SIZE = 640
+
+# Podpisy z atlasu znaków mogą różnić się od ImageDraw.text najwyżej o tyle (0-255)
+TEXT_TOLERANCE = 1
+TEXT_FONT_SIZES = (9, 18, 30)
+# Zakres grubości obwódki w GUI (sections/districts.py)
+TEXT_OUTLINE_WIDTHS = range(0, 11)
+
+# Wynik wolniejszy od punktu odniesienia o więcej niż ten współczynnik to regresja
+REGRESSION_THRESHOLD = 1.2
+
+
+def clear_caches():
+    """Czyści wszystkie bufory renderowania, żeby zmierzyć pierwsze (zimne) wywołanie."""
+    assets.cache.clear()
+    text_stamp.cache_clear()
+    glyph_masks.cache_clear()
+    layout_name.cache_clear()
+    tinted_icon.cache_clear()
+    speed_bbox.cache_clear()
+    with features._stores_lock:
+        features._stores.clear()
+
+
+def measure(work, repeat, setup=None):
+    """
+    Czas pierwszego wywołania `work` po wyczyszczeniu buforów ("cold") oraz
+    mediana i minimum z `repeat` kolejnych wywołań ("warm", "min"), w sekundach.
+    """
+    clear_caches()
+    if setup:
+        setup()
+    start = time.perf_counter()
+    work()
+    cold = time.perf_counter() - start
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - start)
+    return {"cold": cold, "warm": statistics.median(times), "min": min(times)}
+
+
+def checked(work):
+    """Opakowuje `work` tak, żeby błąd połknięty przez renderer sekcji przerywał benchmark."""
+    def run():
+        report = RenderReport()
+        with report.activate():
+            work()
+        if report.errors:
+            raise RuntimeError("; ".join(error["message"] for error in report.errors))
+    return run
+
+
+def layer_settings(data_dir, size, count):
+    return (DistrictsSettings(data_path=districts_path(data_dir, count, size)),
+            SpeedCamerasSettings(data_path=speed_cameras_path(data_dir, count, size)))
+
+
+def bench_sections(results, data_dir, size, count, repeat):
+    districts, cameras = layer_settings(data_dir, size, count)
+    # Jedna warstwa na wszystkie przebiegi - mierzymy rysowanie, nie alokację obrazu
+    layer = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    coverage = CoverageSettings(enabled=True, data_path=cameras.data_path)
+    for renderer, settings in ((DistrictsRenderer(), districts), (SpeedCamerasRenderer(), cameras),
+                               (CoverageRenderer(), coverage)):
+        results[f"section:{renderer.name}/map={size}/n={count}"] = measure(
+            checked(lambda: renderer.render(layer, draw, settings)), repeat)
+
+
+def text_difference(text, font, outline_width):
+    """Największa różnica kanału między draw_text a ImageDraw.text na nieprzezroczystym tle."""
+    left, top, right, bottom = font.getbbox(text, stroke_width=outline_width)
+    size = (right - left + 4, bottom - top + 4)
+    stamped = Image.new("RGBA", size, (90, 120, 60, 255))
+    drawn = stamped.copy()
+    xy = (2 - left, 2 - top)
+    draw_text(stamped, xy, text, font, outline_width, (255, 255, 255), (0, 0, 0))
+    ImageDraw.Draw(drawn).text(xy, text, font=font, fill=(255, 255, 255),
+                               stroke_width=outline_width, stroke_fill=(0, 0, 0))
+    return max(high for _, high in ImageChops.difference(stamped, drawn).getextrema())
+
+
+def bench_text(results, repeat):
+    """
+    Składanie stempli podpisów dzielnic i fotoradarów z atlasu znaków
+    (renderers.text). Każdy podpis z resources/ jest też porównywany z
+    ImageDraw.text dla wszystkich grubości obwódki z GUI - różnica ponad
+    TEXT_TOLERANCE przerywa benchmark.
+    """
+    root = os.path.dirname(BENCHMARKS_DIR)
+    lines = set(SPEEDS)
+    for district in assets.load_json(os.path.join(root, DistrictsSettings.data_path)):
+        lines.update(wrap_name(district["name"], DistrictsSettings.wrap_limit))
+    for camera in assets.load_json(os.path.join(root, SpeedCamerasSettings.data_path)):
+        lines.add(str(camera.get("speed", "")))
+    lines.discard("")
+    lines = sorted(lines)
+
+    for font_size in TEXT_FONT_SIZES:
+        font = assets.load_font(DistrictsSettings.font_path, font_size)
+        for outline_width in TEXT_OUTLINE_WIDTHS:
+            for text in lines:
+                difference = text_difference(text, font, outline_width)
+                if difference > TEXT_TOLERANCE:
+                    raise RuntimeError(f"Podpis '{text}' (czcionka {font_size}, obwódka {outline_width}) "
+                                       f"różni się od ImageDraw.text o {difference}")
+
+    def stamps(outline_width):
+        # Bez bufora gotowych stempli - mierzymy składanie z atlasu znaków
+        text_stamp.cache_clear()
+        font = assets.load_font(DistrictsSettings.font_path, DistrictsSettings.font_size)
+        for text in lines:
+            text_stamp(text, font, outline_width, (255, 255, 255), (0, 0, 0))
+
+    for outline_width in (1, 3, 8):
+        results[f"text:stamps/outline={outline_width}/n={len(lines)}"] = measure(
+            lambda: stamps(outline_width), repeat)
+
+
+def bench_labels(results, data_dir, size, count, repeat):
+    """
+    Rozmieszczanie podpisów dzielnic i prędkości fotoradarów naraz. Przy 10k
+    wpisów na mapie 4096 px większość podpisów koliduje i próbuje wszystkich
+    kandydatów, zanim zostanie ukryta - to najgorszy przypadek.
+    """
+    sections = list(layer_settings(data_dir, size, count))
+    results[f"labels/map={size}/n={count}"] = measure(checked(lambda: solve_labels(sections, (size, size))), repeat)
+
+
+def bench_watch(results, data_dir, size, count, repeat, output_dir):
+    """
+    Łatanie mapy (renderers.watch) po przesunięciu jednego fotoradaru i jednej
+    dzielnicy, w pełnej skali i w skali podglądu, z mapą pokrycia. Na końcu
+    łatany obraz jest porównywany z renderowaniem całej mapy - każda różnica
+    przerywa benchmark.
+    """
+    districts, cameras = layer_settings(data_dir, size, count)
+    for settings in (districts, cameras):
+        path = os.path.join(output_dir, f"watch_{settings.name}.json")
+        shutil.copy(settings.data_path, path)
+        settings.data_path = path
+    job = RenderJob(map_path=map_path(data_dir, size),
+                    sections=[CoverageSettings(enabled=True, data_path=cameras.data_path), cameras, districts])
+
+    for name, preview_size in (("full", None), ("preview", WATCH_PREVIEW_SIZE)):
+        clear_caches()
+        watcher = MapWatcher(preview_size=preview_size)
+        watcher.update(job)
+        times = []
+        for step in range(repeat + 1):
+            for settings in (cameras, districts):
+                with open(settings.data_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+                entries[step % len(entries)]["x"] += 25
+                with open(settings.data_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+            start = time.perf_counter()
+            checked(lambda: watcher.update(job))()
+            times.append(time.perf_counter() - start)
+
+        base, scale = watcher.base(job)
+        if watcher.image.tobytes() != compose(base, job.sections, Viewport(scale=scale)).tobytes():
+            raise RuntimeError(f"Łatany obraz ({name}, mapa {size} px, {count} wpisów) różni się od całej mapy")
+        warm = times[1:] or times
+        results[f"watch-{name}/map={size}/n={count}"] = {
+            "cold": times[0], "warm": statistics.median(warm), "min": min(warm)}
+
+
+def bench_export(results, data_dir, size, count, repeat, output_dir):
+    job = RenderJob(map_path=map_path(data_dir, size), sections=list(layer_settings(data_dir, size, count)))
+    output_path = os.path.join(output_dir, f"export_{size}.png")
+
+    report = RenderReport()
+
+    def export():
+        with report.activate():
+            export_image(render_map(job), output_path, DEFAULT_PROFILE)
+
+    result = measure(checked(export), repeat)
+    # Podział na etapy (dekodowanie, sekcje, składanie, zapis) - średnio na przebieg
+    result["stages"] = {name: entry["seconds"] / entry["calls"] for name, entry in report.stages.items()}
+    results[f"export/map={size}/n={count}"] = result
+
+    results[f"export-tiled/map={size}/n={count}"] = measure(
+        checked(lambda: render_tiled(job, output_path, profile_name=DEFAULT_PROFILE)), repeat)
+
+
+def bench_radar(results, data_dir, size, count, repeat):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QRect
+    except ImportError:
+        print("PyQt6 nie jest zainstalowane - pomijam benchmarki radar.py")
+        return
+    app = QApplication.instance() or QApplication([])
+    from radar import MapViewer
+    from renderers.features import FeatureStore
+
+    image = assets.load_map(map_path(data_dir, size))
+    viewer = MapViewer()
+    viewer.resize(1000, 700)
+    results[f"radar:set_image/map={size}"] = measure(lambda: viewer.set_image(image), repeat)
+
+    store = FeatureStore()
+    viewer.feature_store = store
+    points = assets.load_json(speed_cameras_path(data_dir, count, size))
+    for index, point in enumerate(points):
+        store.add(point, viewer.marker_bounds(point), index=index)
+
+    def clear_view():
+        viewer.tiles.clear()
+        viewer.labels.clear()
+        viewer.label_pixels = 0
+
+    # Całe okno: mapa dopasowana do widoku i powiększona 1:1
+    viewer.fit_to_view()
+    results[f"radar:redraw-fit/map={size}/n={count}"] = measure(viewer.grab, repeat, setup=clear_view)
+    # Bez auto_fit grab() (zdarzenie zmiany rozmiaru) dopasowałby mapę z powrotem do widoku
+    viewer.auto_fit = False
+    viewer.zoom = 1.0
+    viewer.center_on(size / 2, size / 2)
+    results[f"radar:redraw-1:1/map={size}/n={count}"] = measure(viewer.grab, repeat, setup=clear_view)
+
+    # Dodanie punktu: wpis w indeksie i przerysowanie tylko fragmentu wokół niego
+    point = {"name": "Benchmark", "x": size // 2, "y": size // 2, "speed": "50 km/h"}
+
+    def add_point():
+        bounds = viewer.marker_bounds(point)
+        index = store.add(point, bounds)
+        top_left = viewer.map_to_view(bounds[0], bounds[1])
+        bottom_right = viewer.map_to_view(bounds[2], bounds[3])
+        viewer.grab(QRect(int(top_left.x()) - 1, int(top_left.y()) - 1,
+                          int(bottom_right.x() - top_left.x()) + 3, int(bottom_right.y() - top_left.y()) + 3))
+        store.remove(index)
+
+    results[f"radar:add-point/map={size}/n={count}"] = measure(add_point, repeat)
+    app.processEvents()
+
+
+def bench_startup(results, repeat):
+    """Czas od uruchomienia procesu main.py do pokazania okna (main.py --startup-time), każdy w nowym procesie."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    main_path = os.path.join(os.path.dirname(BENCHMARKS_DIR), "main.py")
+    times = []
+    for _ in range(repeat + 1):
+        completed = subprocess.run([sys.executable, main_path, "--startup-time"], cwd=os.path.dirname(main_path),
+                                   env=env, capture_output=True, text=True)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith("Start:")]
+        if completed.returncode != 0 or not lines:
+            print("Nie udało się uruchomić main.py - pomijam benchmark startu")
+            print(completed.stderr.strip())
+            return
+        times.append(float(lines[-1].split()[1]) / 1000)
+    warm = times[1:] or times
+    results["startup:main.py"] = {"cold": times[0], "warm": statistics.median(warm), "min": min(warm)}
+
+
+def run(args):
+    results = {}
+    output_dir = os.path.join(args.data_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+    if "startup" in args.suites:
+        bench_startup(results, args.repeat)
+    if "text" in args.suites:
+        bench_text(results, args.repeat)
+    for size in args.sizes:
+        print(f"Mapa {size} px...", flush=True)
+        map_path(args.data_dir, size)
+        for count in args.counts:
+            if "sections" in args.suites:
+                bench_sections(results, args.data_dir, size, count, args.repeat)
+            if "labels" in args.suites:
+                bench_labels(results, args.data_dir, size, count, args.repeat)
+            if "radar" in args.suites:
+                bench_radar(results, args.data_dir, size, count, args.repeat)
+        if "watch" in args.suites:
+            bench_watch(results, args.data_dir, size, args.export_count, args.repeat, output_dir)
+        if "export" in args.suites:
+            bench_export(results, args.data_dir, size, args.export_count, args.repeat, output_dir)
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Wypisuje porównanie czasów "warm" z punktem odniesienia; zwraca liczbę regresji."""
+    regressions = 0
+    print(f"\n{'benchmark':<52} {'teraz':>9} {'wzorzec':>9} {'zmiana':>8}")
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<52} {result['warm'] * 1000:>7.1f}ms {'-':>9}")
+            continue
+        ratio = result["warm"] / reference["warm"] if reference["warm"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESJA"
+            regressions += 1
+        print(f"{name:<52} {result['warm'] * 1000:>7.1f}ms {reference['warm'] * 1000:>7.1f}ms {ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def print_results(current):
+    print(f"\n{'benchmark':<52} {'cold':>9} {'warm':>9} {'min':>9}")
+    for name, result in current["results"].items():
+        print(f"{name:<52} {result['cold'] * 1000:>7.1f}ms {result['warm'] * 1000:>7.1f}ms {result['min'] * 1000:>7.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarki renderowania map na syntetycznych danych.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Boki map w pikselach (np. 1024 4096 16384)")
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULT_COUNTS,
+                        help="Liczby wpisów w districts.json / speed_cameras.json (np. 10 1000 100000)")
+    parser.add_argument("--export-count", type=int, default=1000, help="Liczba wpisów warstw w benchmarku eksportu")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=SUITES, help="Które benchmarki uruchomić")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Liczba pomiarów po pierwszym (zimnym)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Katalog na syntetyczne dane")
+    parser.add_argument("--output", metavar="PATH", help="Zapisz wyniki do pliku JSON")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Zapisz wyniki jako punkt odniesienia NAME")
+    parser.add_argument("--compare", metavar="NAME", help="Porównaj z punktem odniesienia NAME")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Ile razy wolniej niż wzorzec uznać za regresję")
+    args = parser.parse_args(argv)
+
+    current = run(args)
+    print_results(current)
+
+    paths = []
+    if args.output:
+        paths.append(args.output)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        paths.append(os.path.join(BASELINE_DIR, f"{args.save_baseline}.json"))
+    for path in paths:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+        print(f"Zapisano wyniki: {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegresje: {regressions} (próg {args.threshold:.2f}x)")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Syntetyczne dane do benchmarków: mapy bazowe (ciemne tło z siatką dróg,
+podobne do resources/map.png) i pliki warstw districts.json /
+speed_cameras.json z dowolną liczbą wpisów. Dane są deterministyczne (stałe
+ziarno) i zapisywane raz - kolejne uruchomienia korzystają z gotowych plików.
+"""
+import os
+import json
+import random
+from PIL import Image, ImageDraw
+
+BACKGROUND = (28, 24, 28, 255)
+ROAD_COLORS = ((232, 212, 196, 255), (196, 160, 128, 255), (90, 80, 72, 255))
+
+SYLLABLES = ("SAN", "TA", "MA", "RIA", "LOS", "VE", "RO", "NA", "DEL", "MAR", "PE", "RO",
+             "BAY", "SIDE", "EL", "CO", "RE", "DO", "GAN", "TON", "VIL", "LA", "MON", "TE")
+SPEEDS = ("40 km/h", "50 km/h", "60 km/h", "70 km/h", "80 km/h", "90 km/h", "120 km/h")
+
+
+def make_map(path, size, seed=0):
+    """Zapisuje kwadratową mapę `size` x `size` (PNG) z losową siatką dróg."""
+    rng = random.Random(seed)
+    image = Image.new("RGBA", (size, size), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    # Gęstość dróg jak na mapie 3072 px: około 300 odcinków na 3072 x 3072
+    for _ in range(max(50, 300 * size * size // (3072 * 3072))):
+        x, y = rng.uniform(0, size), rng.uniform(0, size)
+        points = [(x, y)]
+        for _ in range(rng.randint(2, 6)):
+            x += rng.uniform(-size / 12, size / 12)
+            y += rng.uniform(-size / 12, size / 12)
+            points.append((x, y))
+        draw.line(points, fill=rng.choice(ROAD_COLORS), width=rng.choice((2, 3, 5, 8)))
+    image.save(path, compress_level=1)
+
+
+def random_name(rng):
+    words = [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        for _ in range(rng.randint(1, 3))
+    ]
+    return " ".join(words)
+
+
+def make_districts(path, count, extent, seed=0):
+    rng = random.Random(seed)
+    data = [{"name": random_name(rng), "x": rng.randrange(extent), "y": rng.randrange(extent)}
+            for _ in range(count)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def make_speed_cameras(path, count, extent, seed=0):
+    rng = random.Random(seed)
+    data = [{"name": random_name(rng).title(), "x": rng.randrange(extent), "y": rng.randrange(extent),
+             "speed": rng.choice(SPEEDS)}
+            for _ in range(count)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def ensure(path, make, *args):
+    """Tworzy plik `path` funkcją `make`, jeśli jeszcze go nie ma; zwraca ścieżkę."""
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        make(path, *args)
+    return path
+
+
+def map_path(data_dir, size):
+    return ensure(os.path.join(data_dir, f"map_{size}.png"), make_map, size)
+
+
+def districts_path(data_dir, count, extent):
+    return ensure(os.path.join(data_dir, f"districts_{count}_{extent}.json"), make_districts, count, extent)
+
+
+def speed_cameras_path(data_dir, count, extent):
+    return ensure(os.path.join(data_dir, f"speed_cameras_{count}_{extent}.json"), make_speed_cameras, count, extent)
@@ -1,29 +1,72 @@
+import time
+# Początek startu programu - przed importem PyQt6 i rendererów (pomiar: python main.py --startup-time)
+STARTED = time.perf_counter()
+
 import sys
 import os
-from PIL import Image, ImageDraw
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QFileDialog,
-    QVBoxLayout, QMessageBox
+    QVBoxLayout, QHBoxLayout, QMessageBox, QProgressBar, QComboBox, QCheckBox
 )
-from sections.districts import DistrictsSection
-from sections.speed_cameras import SpeedCamerasSection
-import datetime
+from PyQt6.QtCore import QTimer
+from sections.lazy import LazySection
+from sections.registry import discover_sections
+from renderers.export import DEFAULT_PROFILE, EXPORT_PROFILES
+from worker import RenderQueue
+from preview import MapPreview
 
 class MapCustomizer(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Map Customizer")
-        self.resize(400, 500)
+        self.resize(1100, 700)
 
         self.map_path = "resources/map.png"
-        self.sections = [
-            SpeedCamerasSection(),
-            DistrictsSection()
-        ]
+        # Katalog ostatniego eksportu kafelków - kolejny eksport do niego zapisuje tylko zmienione kafelki
+        self.xyz_dir = None
+        # Sekcje z rejestru; moduł sekcji jest importowany dopiero, gdy jest włączona lub rozwinięta
+        self.sections = [LazySection(info) for info in discover_sections()]
+
+        # Bufory warstw i gotowych map powstają przy pierwszym eksporcie (create_caches)
+        self.layer_cache = None
+        self.output_cache = None
+
+        self.render_queue = RenderQueue(parent=self)
+        self.render_queue.progress.connect(self.on_render_progress)
+        self.render_queue.finished.connect(self.on_render_finished)
+        self.render_queue.failed.connect(self.on_render_failed)
+        self.render_queue.cancelled.connect(self.on_render_cancelled)
+        self.render_queue.queued.connect(self.on_render_queued)
 
         self.setup_ui()
 
+    def create_caches(self):
+        """
+        Renderery i Pillow są importowane dopiero tutaj (i w podglądzie po
+        pokazaniu okna), nie przy starcie programu.
+        """
+        if self.layer_cache is None:
+            from renderers import LayerCache
+            from renderers.output_cache import OutputCache
+            # Warstwy sekcji w pełnej rozdzielczości - po zmianie jednej sekcji
+            # kolejne generowanie renderuje tylko ją, resztę składa z bufora
+            self.layer_cache = LayerCache(max_layers=4)
+            # Gotowe mapy na dysku - to samo zlecenie zwraca istniejący plik bez renderowania
+            self.output_cache = OutputCache()
+
+    def build_job(self):
+        from renderers import RenderJob
+        return RenderJob(
+            map_path=self.map_path,
+            sections=[settings for settings in (section.get_settings() for section in self.sections)
+                      if settings is not None],
+            place_labels=self.place_labels_check.isChecked()
+        )
+
     def setup_ui(self):
+        self.preview = MapPreview(self.build_job)
+
+        main_layout = QHBoxLayout()
         layout = QVBoxLayout()
 
         self.map_btn = QPushButton("Wybierz mapę")
@@ -32,41 +75,144 @@ class MapCustomizer(QWidget):
 
         for section in self.sections:
             layout.addWidget(section.get_widget())
+            section.connect_changed(self.preview.schedule_refresh)
+
+        # Podpisy wszystkich sekcji rozmieszczane tak, żeby na siebie nie nachodziły
+        self.place_labels_check = QCheckBox("Automatycznie rozmieszczaj podpisy")
+        self.place_labels_check.toggled.connect(self.preview.schedule_refresh)
+        layout.addWidget(self.place_labels_check)
+
+        layout.addWidget(QLabel("Format zapisu:"))
+        self.profile_combo = QComboBox()
+        for name, profile in EXPORT_PROFILES.items():
+            self.profile_combo.addItem(f"{name} - {profile.description}", name)
+        self.profile_combo.setCurrentIndex(list(EXPORT_PROFILES).index(DEFAULT_PROFILE))
+        layout.addWidget(self.profile_combo)
 
         self.generate_btn = QPushButton("Wygeneruj mapę")
         self.generate_btn.clicked.connect(self.generate_map)
         layout.addWidget(self.generate_btn)
 
-        self.setLayout(layout)
+        self.xyz_btn = QPushButton("Eksportuj kafelki (z/x/y)")
+        self.xyz_btn.clicked.connect(self.export_xyz)
+        layout.addWidget(self.xyz_btn)
+
+        progress_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        progress_layout.addWidget(self.progress_bar)
+        self.cancel_btn = QPushButton("Anuluj")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.render_queue.cancel)
+        progress_layout.addWidget(self.cancel_btn)
+        layout.addLayout(progress_layout)
+
+        self.status_label = QLabel("")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        layout.addStretch()
+
+        main_layout.addLayout(layout)
+        main_layout.addWidget(self.preview, 1)
+        self.setLayout(main_layout)
+        self.preview.schedule_refresh()
 
     def choose_map(self):
         path, _ = QFileDialog.getOpenFileName(self, "Wybierz mapę", "", "Obrazy (*.png *.jpg *.jpeg)")
         if path:
             self.map_path = path
+            self.preview.schedule_refresh()
 
     def generate_map(self):
+        from renderers.output_cache import export_cached
+        from renderers.profiling import RenderReport
+        self.create_caches()
+        # Ustawienia odczytujemy z widgetów w wątku GUI, renderowanie i zapis idą do wątku w tle
+        job = self.build_job()
+
+        profile_name = self.profile_combo.currentData()
+
+        def export(progress, is_cancelled):
+            # Czasy etapów i błędy sekcji trafiają do raportu pokazywanego po zapisie
+            report = RenderReport()
+            with report.activate():
+                steps = sum(1 for settings in job.sections if settings.enabled)
+                result = export_cached(job, self.output_cache, profile_name,
+                                       lambda step, _, name: progress(step, steps, name), is_cancelled,
+                                       layer_cache=self.layer_cache)
+            return result, report
+
+        self.cancel_btn.setEnabled(True)
+        self.render_queue.submit(export)
+
+    def export_xyz(self):
+        output_dir = QFileDialog.getExistingDirectory(self, "Katalog na kafelki", self.xyz_dir or "output")
+        if not output_dir:
+            return
+        self.xyz_dir = output_dir
+        job = self.build_job()
+        profile_name = self.profile_combo.currentData()
+
+        # Eksport kafelków jest rzadki - moduł importujemy dopiero przy pierwszym użyciu
+        from renderers.xyz import export_tiles
+        from renderers.profiling import RenderReport
+        self.create_caches()
+
+        def export(progress, is_cancelled):
+            report = RenderReport()
+            with report.activate():
+                result = export_tiles(job, output_dir, profile_name=profile_name, progress=progress,
+                                      is_cancelled=is_cancelled, layer_cache=self.layer_cache)
+            return result, report
+
+        self.cancel_btn.setEnabled(True)
+        self.render_queue.submit(export)
+
+    def on_render_progress(self, step, total, name):
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(step)
+        self.status_label.setText(f"Renderowanie: {name} ({step + 1}/{total})")
+
+    def on_render_queued(self):
+        self.status_label.setText("Zlecenie w kolejce - zostanie wykonane po bieżącym renderowaniu.")
+
+    def on_render_finished(self, outcome):
+        result, report = outcome
+        output_path = result.path
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        self.status_label.setText(f"Zapisano jako: {result.summary()}\n{report.summary()}")
+        self.cancel_btn.setEnabled(self.render_queue.is_busy())
+        if self.render_queue.is_busy():
+            return
+        if report.errors:
+            QMessageBox.warning(self, "Błędy sekcji",
+                                "\n".join(error["message"] for error in report.errors))
         try:
-            image = Image.open(self.map_path).convert("RGBA")
-            draw = ImageDraw.Draw(image)
-
-            for section in self.sections:
-                if section.is_enabled():
-                    section.render(image, draw)
-
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            output_dir = "output"
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, f"custom_map_{timestamp}.png")
-            image.save(output_path)
             os.startfile(output_path)
             QMessageBox.information(self, "Sukces", f"Zapisano jako: {output_path}")
-
         except Exception as e:
             QMessageBox.critical(self, "Błąd", str(e))
 
+    def on_render_failed(self, message):
+        self.cancel_btn.setEnabled(self.render_queue.is_busy())
+        self.status_label.setText("")
+        QMessageBox.critical(self, "Błąd", message)
+
+    def on_render_cancelled(self):
+        self.progress_bar.setValue(0)
+        self.cancel_btn.setEnabled(self.render_queue.is_busy())
+        self.status_label.setText("Renderowanie anulowane.")
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = MapCustomizer()
     window.show()
+    if "--startup-time" in sys.argv:
+        # Zimny start: czas od uruchomienia do pierwszego obiegu pętli zdarzeń z widocznym oknem
+        def report_startup():
+            built = [section.get_name() for section in window.sections if section.section is not None]
+            print(f"Start: {(time.perf_counter() - STARTED) * 1000:.1f} ms (zbudowane sekcje: {', '.join(built)})")
+            app.quit()
+        QTimer.singleShot(0, report_startup)
     sys.exit(app.exec())
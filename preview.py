@@ -0,0 +1,100 @@
+"""
+Podgląd mapy w niskiej rozdzielczości. Każda sekcja jest renderowana na
+osobną przezroczystą warstwę (LayerCache); po zmianie ustawień (z opóźnieniem)
+odświeżana jest tylko warstwa, której ustawienia się zmieniły. Pliki mapy
+i warstw są co chwilę sprawdzane (renderers.watch) - po ich zmianie podgląd
+jest łatany tylko w miejscach zmienionych obiektów.
+"""
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtGui import QPixmap
+from PyQt6.QtCore import Qt, QTimer
+
+from worker import RenderQueue
+
+PREVIEW_SIZE = 640
+DEBOUNCE_MS = 200
+WATCH_INTERVAL_MS = 1000
+
+
+def render_preview(map_path, sections, layer_cache, is_cancelled, placements=None):
+    """
+    Renderuje podgląd mapy na pomniejszonej kopii mapy bazowej. Podpisy
+    (`placements`) są rozmieszczane w skali mapy, tak jak przy eksporcie.
+    """
+    import assets
+    from renderers import compose
+    from renderers.base import Viewport
+    base = assets.load_thumbnail(map_path, PREVIEW_SIZE)
+    viewport = Viewport(scale=base.width / assets.load_map(map_path).width)
+    return compose(base, sections, viewport, is_cancelled=is_cancelled, layer_cache=layer_cache,
+                   placements=placements)
+
+
+class MapPreview(QLabel):
+    def __init__(self, get_job, parent=None):
+        super().__init__(parent)
+        self.get_job = get_job
+        # Tworzone przy pierwszym odświeżeniu - okno startuje bez rendererów i Pillow
+        self.layer_cache = None
+        self.watcher = None
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.setMinimumSize(PREVIEW_SIZE, PREVIEW_SIZE)
+        self.setText("Ładowanie podglądu...")
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.refresh)
+
+        self.render_queue = RenderQueue(parent=self)
+        self.render_queue.finished.connect(self.on_preview_ready)
+        self.render_queue.failed.connect(self.on_preview_failed)
+
+        self.watch_timer = QTimer(self)
+        self.watch_timer.setInterval(WATCH_INTERVAL_MS)
+        self.watch_timer.timeout.connect(self.check_files)
+        self.watch_timer.start()
+
+    def create_caches(self):
+        if self.watcher is None:
+            from renderers import LayerCache
+            from renderers.watch import MapWatcher
+            self.layer_cache = LayerCache()
+            self.watcher = MapWatcher(preview_size=PREVIEW_SIZE)
+
+    def schedule_refresh(self):
+        """Odświeża podgląd po krótkiej przerwie w zmianach ustawień."""
+        self.debounce_timer.start()
+
+    def refresh(self):
+        self.create_caches()
+        job = self.get_job()
+
+        def work(progress, is_cancelled):
+            from renderers.pipeline import job_placements
+            return render_preview(job.map_path, job.sections, self.layer_cache, is_cancelled,
+                                  job_placements(job))
+
+        self.render_queue.submit(work)
+
+    def check_files(self):
+        """Przerysowuje zmienione obiekty, jeśli plik mapy lub warstwy zmienił się na dysku."""
+        if self.render_queue.is_busy():
+            return
+        self.create_caches()
+        job = self.get_job()
+        if not self.watcher.changed(job):
+            return
+
+        def work(progress, is_cancelled):
+            # Kopia, bo obraz obserwatora jest łatany w miejscu przy następnej zmianie
+            return self.watcher.update(job, is_cancelled)[0].copy()
+
+        self.render_queue.submit(work)
+
+    def on_preview_ready(self, image):
+        from PIL.ImageQt import ImageQt
+        self.setPixmap(QPixmap.fromImage(ImageQt(image)))
+
+    def on_preview_failed(self, message):
+        self.setText(f"Błąd podglądu: {message}")
@@ -1,60 +1,331 @@
 import sys
 import os
 import json
+import math
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QFileDialog, QLineEdit, QMessageBox, QInputDialog, QScrollArea
+    QFileDialog, QLineEdit, QMessageBox, QInputDialog
 )
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor, QFont
-from PyQt6.QtCore import Qt, QPoint, pyqtSignal # Import pyqtSignal
+from PyQt6.QtGui import (
+    QPixmap, QImage, QPainter, QColor, QFont, QFontDatabase, QFontMetricsF, QPainterPath, QPen
+)
+from PyQt6.QtCore import Qt, QPoint, QPointF, QRect, QRectF, pyqtSignal # Import pyqtSignal
 
 from PIL import Image, ImageDraw, ImageFont # For drawing on the image
 from PIL.ImageQt import ImageQt # For converting PIL Image to QImage/QPixmap
 
-class ClickableImageLabel(QLabel):
+import assets # Wspólny bufor map i czcionek
+from renderers.features import FeatureStore # Indeks przestrzenny punktów
+from renderers.feature_file import FEATURE_EXTENSION, write_features # Binarny format punktów (.feat)
+from renderers.pyramid import TilePyramid # Piramida kafelków do wyświetlania mapy
+
+class MapViewer(QWidget):
     """
-    Niestandardowa klasa QLabel, która emituje sygnał z współrzędnymi kliknięcia myszy
-    w odniesieniu do oryginalnego rozmiaru obrazu, nawet jeśli obraz jest skalowany.
+    Widok mapy z powiększaniem (kółko myszy) i przesuwaniem (przeciąganie).
+    Mapa jest wyświetlana z piramidy kafelków - rysowany jest poziom
+    dopasowany do powiększenia, a na QPixmap konwertowane są tylko widoczne
+    kafelki. Kliknięcie emituje współrzędne w pikselach oryginalnej mapy.
     """
     # Sygnał emitujący współrzędne x, y kliknięcia
     clicked = pyqtSignal(int, int)
+    # Sygnał emitujący indeks istniejącego punktu, w pobliżu którego kliknięto
+    feature_clicked = pyqtSignal(int)
+
+    # Maksymalna odległość (w pikselach mapy) kliknięcia od istniejącego punktu
+    HIT_RADIUS = 10
+
+    # Promień kółka znacznika punktu (w pikselach mapy)
+    MARKER_RADIUS = 5
+
+    # Zmiana powiększenia na jeden skok kółka myszy i największe powiększenie
+    ZOOM_STEP = 1.25
+    MAX_ZOOM = 8.0
+
+    # Ile kafelków trzymać jako QPixmap (najdawniej użyte są usuwane)
+    MAX_TILES = 256
+
+    # Ile pikseli podpisów punktów trzymać jako QPixmap (ok. 128 MB) i zapas wokół
+    # tekstu na obwódkę (w pikselach mapy)
+    MAX_LABEL_PIXELS = 32 * 1024 * 1024
+    LABEL_PADDING = 2
+
+    # Poniżej tej wysokości tekstu na ekranie (w pikselach) podpisy punktów są
+    # nieczytelne i nie są rysowane - widać wtedy same kółka
+    MIN_LABEL_PIXELS = 6
+
+    # Przesunięcie myszy (w pikselach ekranu), od którego wciśnięcie jest przeciąganiem, a nie kliknięciem
+    DRAG_THRESHOLD = 4
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        # Włącz śledzenie myszy, aby wykrywać kliknięcia
         self.setMouseTracking(True)
-        # Skaluj zawartość obrazu, aby dopasować ją do rozmiaru etykiety
-        self.setScaledContents(True)
+        self.setMinimumSize(200, 200)
+        self.pyramid = None
+        self.zoom = 1.0
+        # Punkt mapy (w pikselach oryginału) widoczny w lewym górnym rogu widoku
+        self.origin = QPointF(0, 0)
+        # Dopasowuj mapę do okna, dopóki użytkownik sam nie powiększy lub przesunie widoku
+        self.auto_fit = True
+        self.tiles = OrderedDict()
+        self.labels = OrderedDict()
+        self.label_pixels = 0
+        self.press_pos = None
+        self.press_origin = None
+        self.dragging = False
+        # Indeks przestrzenny punktów (FeatureStore) do wykrywania kliknięć w istniejące punkty
+        # i do wybierania znaczników, które trzeba narysować w odświeżanym fragmencie
+        self.feature_store = None
+        self.marker_font = self.load_marker_font()
+
+    @staticmethod
+    def load_marker_font():
+        """Czcionka podpisów punktów: Fredoka-Bold.ttf, jeśli istnieje, w przeciwnym razie domyślna."""
+        font = QFont()
+        font_id = QFontDatabase.addApplicationFont("resources/Fredoka-Bold.ttf")
+        if font_id != -1:
+            font = QFont(QFontDatabase.applicationFontFamilies(font_id)[0])
+        font.setPixelSize(16)
+        return font
+
+    def set_image(self, image):
+        """Ustawia mapę (obraz PIL lub None) i dopasowuje ją do rozmiaru widoku."""
+        self.pyramid = TilePyramid(image) if image is not None else None
+        self.tiles.clear()
+        self.fit_to_view()
+
+    def fit_zoom(self):
+        width, height = self.pyramid.size
+        return min(self.width() / width, self.height() / height)
+
+    def fit_to_view(self):
+        """Pokazuje całą mapę, wyśrodkowaną w widoku."""
+        self.auto_fit = True
+        if self.pyramid is not None:
+            self.zoom = self.fit_zoom()
+            self.center_on(self.pyramid.size[0] / 2, self.pyramid.size[1] / 2)
+        self.update()
+
+    def center_on(self, x, y):
+        self.origin = QPointF(x - self.width() / (2 * self.zoom), y - self.height() / (2 * self.zoom))
+
+    def zoom_at(self, pos, factor):
+        """Zmienia powiększenie, zachowując punkt mapy pod kursorem `pos`."""
+        map_x, map_y = self.view_to_map(pos)
+        min_zoom = min(self.fit_zoom(), 1.0) / 2
+        self.zoom = max(min_zoom, min(self.MAX_ZOOM, self.zoom * factor))
+        self.origin = QPointF(map_x - pos.x() / self.zoom, map_y - pos.y() / self.zoom)
+        self.auto_fit = False
+        self.update()
+
+    def view_to_map(self, pos):
+        """Pozycja w widoku -> współrzędne (x, y) w pikselach oryginalnej mapy."""
+        return self.origin.x() + pos.x() / self.zoom, self.origin.y() + pos.y() / self.zoom
+
+    def map_to_view(self, x, y):
+        return QPointF((x - self.origin.x()) * self.zoom, (y - self.origin.y()) * self.zoom)
+
+    def marker_lines(self, point):
+        return [point["name"], f"({point.get('speed', '')})"]
+
+    def marker_bounds(self, point):
+        """Prostokąt (x0, y0, x1, y1) w pikselach mapy zajmowany przez znacznik punktu i jego podpis."""
+        metrics = QFontMetricsF(self.marker_font)
+        lines = self.marker_lines(point)
+        half_width = max(max(metrics.horizontalAdvance(line) for line in lines) / 2, self.MARKER_RADIUS)
+        text_bottom = point["y"] + self.MARKER_RADIUS + 2 + len(lines) * metrics.lineSpacing()
+        # Zapas na obwódkę tekstu i kółka
+        margin = 3
+        return (point["x"] - half_width - margin, point["y"] - self.MARKER_RADIUS - margin,
+                point["x"] + half_width + margin, text_bottom + margin)
+
+    def refresh_region(self, bounds):
+        """Przerysowuje tylko fragment widoku odpowiadający prostokątowi `bounds` mapy."""
+        if self.pyramid is None:
+            return
+        top_left = self.map_to_view(bounds[0], bounds[1])
+        bottom_right = self.map_to_view(bounds[2], bounds[3])
+        left, top = math.floor(top_left.x()) - 1, math.floor(top_left.y()) - 1
+        right, bottom = math.ceil(bottom_right.x()) + 2, math.ceil(bottom_right.y()) + 2
+        self.update(QRect(left, top, right - left, bottom - top))
+
+    def tile_pixmap(self, level, column, row):
+        """QPixmap kafelka; konwersja z PIL odbywa się przy pierwszym wyświetleniu kafelka."""
+        key = (level, column, row)
+        pixmap = self.tiles.get(key)
+        if pixmap is not None:
+            self.tiles.move_to_end(key)
+            return pixmap
+        pixmap = QPixmap.fromImage(ImageQt(self.pyramid.tile(level, column, row)))
+        self.tiles[key] = pixmap
+        if len(self.tiles) > self.MAX_TILES:
+            self.tiles.popitem(last=False)
+        return pixmap
+
+    def paintEvent(self, event):
+        """
+        Rysuje widoczne kafelki poziomu piramidy dobranego do powiększenia,
+        a na nich znaczniki punktów leżących w odświeżanym fragmencie.
+        """
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.fillRect(rect, QColor(40, 40, 40))
+        if self.pyramid is None:
+            painter.end()
+            return
 
-    def mousePressEvent(self, event):
+        left, top = self.view_to_map(rect.topLeft())
+        right, bottom = self.view_to_map(QPointF(rect.right() + 1, rect.bottom() + 1))
+        region = (left, top, right, bottom)
+
+        level = self.pyramid.level_for_zoom(self.zoom)
+        scale = self.pyramid.scale(level)
+        if scale * self.zoom != 1:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.zoom < 1)
+        columns, rows = self.pyramid.tile_range(level, region)
+        for row in rows:
+            for column in columns:
+                box = self.pyramid.tile_box(level, column, row)
+                top_left = self.map_to_view(box[0] * scale, box[1] * scale)
+                bottom_right = self.map_to_view(box[2] * scale, box[3] * scale)
+                painter.drawPixmap(QRectF(top_left, bottom_right), self.tile_pixmap(level, column, row),
+                                   QRectF(0, 0, box[2] - box[0], box[3] - box[1]))
+
+        if self.feature_store is not None:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            # Podpisy w rozdzielczości najbliższej potęgi dwójki powiększenia (ostre po przybliżeniu)
+            label_ratio = 2 ** max(0, math.ceil(math.log2(self.zoom)))
+            if self.marker_font.pixelSize() * self.zoom < self.MIN_LABEL_PIXELS:
+                label_ratio = None
+            painter.scale(self.zoom, self.zoom)
+            painter.translate(-self.origin.x(), -self.origin.y())
+            for _, point in self.feature_store.query((left - 1, top - 1, right + 1, bottom + 1)):
+                self.draw_marker(painter, point, label_ratio)
+        painter.end()
+
+    def label_pixmap(self, lines, ratio):
+        """
+        Podpis punktu (żółty tekst z czarną obwódką) narysowany raz do QPixmap
+        w rozdzielczości `ratio` pikseli na piksel mapy. Obrys ścieżki tekstu
+        jest kosztowny, więc przy przesuwaniu i powiększaniu widoku gotowe
+        podpisy są już tylko kopiowane.
         """
-        Obsługuje zdarzenia kliknięcia myszy na etykiecie.
-        Konwertuje pozycję kliknięcia QLabel na współrzędne oryginalnego obrazu.
+        key = (lines, ratio)
+        pixmap = self.labels.get(key)
+        if pixmap is not None:
+            self.labels.move_to_end(key)
+            return pixmap
+
+        metrics = QFontMetricsF(self.marker_font)
+        padding = self.LABEL_PADDING
+        width = max(metrics.horizontalAdvance(line) for line in lines) + 2 * padding
+        height = len(lines) * metrics.lineSpacing() + 2 * padding
+        pixmap = QPixmap(math.ceil(width * ratio), math.ceil(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        path = QPainterPath()
+        for i, line in enumerate(lines):
+            path.addText(QPointF(padding, padding + metrics.ascent() + i * metrics.lineSpacing()),
+                         self.marker_font, line)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.strokePath(path, QPen(QColor(0, 0, 0, 255), 2)) # Czarna obwódka
+        painter.fillPath(path, QColor(255, 255, 0, 255)) # Żółty tekst
+        painter.end()
+
+        self.labels[key] = pixmap
+        self.label_pixels += pixmap.width() * pixmap.height()
+        while self.label_pixels > self.MAX_LABEL_PIXELS and len(self.labels) > 1:
+            _, evicted = self.labels.popitem(last=False)
+            self.label_pixels -= evicted.width() * evicted.height()
+        return pixmap
+
+    def draw_marker(self, painter, point, label_ratio=1):
         """
-        if event.button() == Qt.MouseButton.LeftButton:
-            # Pobierz pozycję kliknięcia względem QLabel
-            pos = event.pos()
-            pixmap = self.pixmap()
-
-            if pixmap and not pixmap.isNull():
-                # Pobierz wymiary oryginalnego pixmapy
-                pm_width = pixmap.width()
-                pm_height = pixmap.height()
-                # Pobierz wymiary aktualnej etykiety QLabel
-                label_width = self.width()
-                label_height = self.height()
-
-                # Oblicz współczynniki skalowania
-                scale_x = pm_width / label_width
-                scale_y = pm_height / label_height
-
-                # Zastosuj skalowanie, aby uzyskać współrzędne oryginalnego pixmapy
-                original_x = int(pos.x() * scale_x)
-                original_y = int(pos.y() * scale_y)
+        Rysuje kółko punktu i podpis (nazwa i prędkość) z czarną obwódką;
+        z `label_ratio` None bez podpisu.
+        """
+        x, y = point["x"], point["y"]
+        radius = self.MARKER_RADIUS
+
+        # Rysuj kółko symbolizujące punkt: czerwone, półprzezroczyste, z białą obwódką
+        painter.setPen(QPen(QColor(255, 255, 255, 255)))
+        painter.setBrush(QColor(255, 0, 0, 180))
+        painter.drawEllipse(QPointF(x, y), radius, radius)
+
+        if label_ratio is None:
+            return
 
+        # Rysuj tekst (nazwa i prędkość) wyśrodkowany pod kółkiem
+        pixmap = self.label_pixmap(tuple(self.marker_lines(point)), label_ratio)
+        width = pixmap.width() / label_ratio
+        painter.drawPixmap(QPointF(x - width / 2, y + radius + 2 - self.LABEL_PADDING), pixmap)
+
+    def wheelEvent(self, event):
+        """Powiększa lub pomniejsza widok wokół kursora."""
+        if self.pyramid is None:
+            return
+        steps = event.angleDelta().y() / 120
+        if steps:
+            self.zoom_at(event.position(), self.ZOOM_STEP ** steps)
+
+    def mousePressEvent(self, event):
+        """Zapamiętuje miejsce wciśnięcia - dopiero puszczenie przycisku rozstrzyga, czy to kliknięcie."""
+        if self.pyramid is not None and event.button() in (Qt.MouseButton.LeftButton, Qt.MouseButton.MiddleButton):
+            self.press_pos = event.position()
+            self.press_origin = QPointF(self.origin)
+            # Środkowy przycisk zawsze przesuwa widok
+            self.dragging = event.button() == Qt.MouseButton.MiddleButton
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        """Przesuwa widok podczas przeciągania."""
+        if self.press_pos is not None:
+            delta = event.position() - self.press_pos
+            if not self.dragging and delta.manhattanLength() >= self.DRAG_THRESHOLD:
+                self.dragging = True
+            if self.dragging:
+                self.setCursor(Qt.CursorShape.ClosedHandCursor)
+                self.origin = self.press_origin - delta / self.zoom
+                self.auto_fit = False
+                self.update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        """
+        Kończy przeciąganie albo - jeśli mysz się nie przesunęła - obsługuje
+        kliknięcie, przeliczając pozycję w widoku na współrzędne oryginalnej mapy.
+        """
+        if self.press_pos is not None and not self.dragging and event.button() == Qt.MouseButton.LeftButton:
+            map_x, map_y = self.view_to_map(event.position())
+            original_x, original_y = math.floor(map_x), math.floor(map_y)
+            width, height = self.pyramid.size
+            if 0 <= original_x < width and 0 <= original_y < height:
                 # Emituj sygnał z oryginalnymi współrzędnymi
                 self.clicked.emit(original_x, original_y)
-        super().mousePressEvent(event)
+
+                # Sprawdź w indeksie, czy kliknięto w pobliżu istniejącego punktu
+                if self.feature_store is not None:
+                    hit = self.feature_store.nearest(original_x, original_y, max_distance=self.HIT_RADIUS)
+                    if hit is not None:
+                        self.feature_clicked.emit(hit[0])
+        self.press_pos = None
+        self.dragging = False
+        self.unsetCursor()
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        """Podwójne kliknięcie przywraca widok całej mapy."""
+        if self.pyramid is not None and event.button() == Qt.MouseButton.RightButton:
+            self.fit_to_view()
+        super().mouseDoubleClickEvent(event)
+
+    def resizeEvent(self, event):
+        if self.pyramid is not None and self.auto_fit:
+            self.fit_to_view()
+        super().resizeEvent(event)
 
 class MapClickExtractorApp(QWidget):
     """
@@ -69,8 +340,8 @@ class MapClickExtractorApp(QWidget):
 
         self.map_path = None
         self.original_image = None # Obraz PIL (do rysowania)
-        self.current_display_pixmap = None # QPixmap (do wyświetlania)
         self.points_data = [] # Lista do przechowywania danych punktów {"name": "...", "x": ..., "y": ..., "speed": "..."}
+        self.points_index = FeatureStore() # Indeks przestrzenny punktów (klucz = pozycja w points_data)
 
         self.setup_ui()
 
@@ -79,17 +350,15 @@ class MapClickExtractorApp(QWidget):
         main_layout = QVBoxLayout()
         control_layout = QHBoxLayout()
 
-        # Obszar wyświetlania obrazu
-        self.image_label = ClickableImageLabel(self)
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        # Obszar wyświetlania obrazu (powiększanie kółkiem myszy, przesuwanie przeciąganiem)
+        self.map_view = MapViewer(self)
+        self.map_view.setToolTip("Kółko myszy - powiększenie, przeciąganie - przesuwanie, "
+                                 "podwójne kliknięcie prawym - cała mapa")
         # Połącz sygnał kliknięcia z metodą obsługi
-        self.image_label.clicked.connect(self.handle_image_click)
-
-        # Obszar przewijania dla obrazu (ważne dla dużych map)
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setWidget(self.image_label)
-        main_layout.addWidget(scroll_area)
+        self.map_view.clicked.connect(self.handle_image_click)
+        self.map_view.feature_clicked.connect(self.handle_point_click)
+        self.map_view.feature_store = self.points_index
+        main_layout.addWidget(self.map_view, 1)
 
         # Przyciski i pola kontrolne
         self.load_map_btn = QPushButton("Wybierz mapę")
@@ -105,6 +374,10 @@ class MapClickExtractorApp(QWidget):
         control_layout.addWidget(self.x_display)
         control_layout.addWidget(self.y_display)
 
+        # Informacja o istniejącym punkcie, w pobliżu którego kliknięto
+        self.hit_display = QLabel("")
+        control_layout.addWidget(self.hit_display)
+
         self.add_point_btn = QPushButton("Dodaj Punkt")
         self.add_point_btn.clicked.connect(self.add_point)
         self.add_point_btn.setEnabled(False) # Wyłącz na początku, dopóki mapa nie zostanie załadowana
@@ -134,8 +407,8 @@ class MapClickExtractorApp(QWidget):
         if path:
             self.map_path = path
             try:
-                # Otwórz obraz PIL i przekonwertuj na RGBA dla spójności
-                self.original_image = Image.open(self.map_path).convert("RGBA")
+                # Pobierz obraz RGBA ze wspólnego bufora (nie jest modyfikowany, rysujemy na kopii)
+                self.original_image = assets.load_map(self.map_path)
                 self.update_map_display() # Wyświetl mapę
                 # Włącz odpowiednie przyciski
                 self.add_point_btn.setEnabled(True)
@@ -143,13 +416,14 @@ class MapClickExtractorApp(QWidget):
                 self.clear_btn.setEnabled(True)
                 self.undo_btn.setEnabled(False) # Resetuj stan przycisku cofania
                 self.points_data = [] # Wyczyść poprzednie punkty przy ładowaniu nowej mapy
+                self.points_index.clear()
                 QMessageBox.information(self, "Mapa załadowana", f"Mapa '{os.path.basename(path)}' załadowana pomyślnie.")
             except Exception as e:
                 QMessageBox.critical(self, "Błąd ładowania mapy", f"Nie udało się załadować mapy: {e}")
                 # Zresetuj stan aplikacji w przypadku błędu
                 self.map_path = None
                 self.original_image = None
-                self.image_label.clear()
+                self.map_view.set_image(None)
                 self.add_point_btn.setEnabled(False)
                 self.save_btn.setEnabled(False)
                 self.clear_btn.setEnabled(False)
@@ -162,11 +436,17 @@ class MapClickExtractorApp(QWidget):
         """
         self.x_display.setText(f"X: {x}")
         self.y_display.setText(f"Y: {y}")
+        self.hit_display.setText("")
         self.current_clicked_x = x
         self.current_clicked_y = y
         # Opcjonalnie, ustaw focus na polu nazwy
         self.name_input.setFocus()
 
+    def handle_point_click(self, index):
+        """Wyświetla dane istniejącego punktu, w pobliżu którego kliknięto."""
+        point = self.points_data[index]
+        self.hit_display.setText(f"Punkt: {point['name']} ({point.get('speed', '')})")
+
     def add_point(self):
         """
         Dodaje nowy punkt do listy na podstawie klikniętych współrzędnych
@@ -200,7 +480,9 @@ class MapClickExtractorApp(QWidget):
             "speed": speed_text.strip()
         }
         self.points_data.append(point) # Dodaj punkt do listy
-        self.update_map_display() # Odśwież wyświetlanie mapy z nowym punktem
+        bounds = self.map_view.marker_bounds(point)
+        self.points_index.add(point, bounds, index=len(self.points_data) - 1)
+        self.map_view.refresh_region(bounds) # Przerysuj tylko fragment z nowym punktem
         self.name_input.clear() # Wyczyść pole nazwy
         self.x_display.setText("X: -") # Zresetuj wyświetlanie współrzędnych
         self.y_display.setText("Y: -")
@@ -215,7 +497,9 @@ class MapClickExtractorApp(QWidget):
         """Usuwa ostatnio dodany punkt z listy."""
         if self.points_data:
             removed_point = self.points_data.pop()
-            self.update_map_display() # Odśwież wyświetlanie mapy
+            bounds = self.points_index.bounds[len(self.points_data)]
+            self.points_index.remove(len(self.points_data))
+            self.map_view.refresh_region(bounds) # Przerysuj tylko fragment, z którego zniknął punkt
             if not self.points_data:
                 self.undo_btn.setEnabled(False) # Wyłącz przycisk cofania, jeśli nie ma punktów
             QMessageBox.information(self, "Cofnięto", f"Usunięto ostatni punkt: {removed_point['name']}")
@@ -230,84 +514,40 @@ class MapClickExtractorApp(QWidget):
             return
 
         # Otwórz okno dialogowe zapisu pliku
-        file_path, _ = QFileDialog.getSaveFileName(self, "Zapisz punkty jako JSON", "speed_cameras.json", "Pliki JSON (*.json)")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Zapisz punkty jako JSON", "speed_cameras.json",
+                                                   "Pliki JSON (*.json);;Pliki binarne obiektów (*.feat)")
         if file_path:
             try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    # Zapisz dane do JSON z wcięciami dla czytelności i obsługą polskich znaków
-                    json.dump(self.points_data, f, indent=4, ensure_ascii=False)
+                if file_path.lower().endswith(FEATURE_EXTENSION):
+                    # Format binarny z indeksem przestrzennym - dla bardzo dużych zbiorów punktów.
+                    # Wczytana wersja pliku jest zamykana, bo zmapowanego pliku Windows nie podmieni
+                    assets.release_features(file_path)
+                    write_features(self.points_data, file_path)
+                else:
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        # Zapisz dane do JSON z wcięciami dla czytelności i obsługą polskich znaków
+                        json.dump(self.points_data, f, indent=4, ensure_ascii=False)
                 QMessageBox.information(self, "Zapisano", f"Punkty zapisano pomyślnie do: {os.path.basename(file_path)}")
             except Exception as e:
-                QMessageBox.critical(self, "Błąd zapisu", f"Nie udało się zapisać pliku JSON: {e}")
+                QMessageBox.critical(self, "Błąd zapisu", f"Nie udało się zapisać pliku: {e}")
 
     def clear_all_points(self):
         """Czyści wszystkie zebrane punkty po potwierdzeniu przez użytkownika."""
         if QMessageBox.question(self, "Potwierdź czyszczenie", "Czy na pewno chcesz wyczyścić wszystkie punkty?",
                                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No) == QMessageBox.StandardButton.Yes:
             self.points_data = [] # Wyczyść listę punktów
-            self.update_map_display() # Odśwież wyświetlanie mapy
+            self.points_index.clear()
+            self.map_view.update() # Odśwież wyświetlanie mapy (bez punktów)
             self.undo_btn.setEnabled(False) # Wyłącz przycisk cofania
             QMessageBox.information(self, "Wyczyszczono", "Wszystkie punkty zostały wyczyszczone.")
 
     def update_map_display(self):
         """
-        Odświeża wyświetlanie mapy, rysując na niej wszystkie dodane punkty
-        i ich nazwy.
+        Przekazuje wczytaną mapę do widoku, który buduje z niej piramidę
+        kafelków. Punkty rysuje widok jako nakładkę, więc dodanie lub cofnięcie
+        punktu odświeża tylko fragment wokół niego.
         """
-        if self.original_image:
-            # Utwórz kopię oryginalnego obrazu do rysowania
-            display_image = self.original_image.copy()
-            draw = ImageDraw.Draw(display_image)
-
-            # Zdefiniuj czcionkę do rysowania tekstu na mapie
-            try:
-                # Spróbuj załadować czcionkę Fredoka-Bold.ttf, jeśli istnieje
-                font_path = "resources/Fredoka-Bold.ttf"
-                if not os.path.exists(font_path):
-                    # Fallback do domyślnej czcionki PIL, jeśli plik czcionki nie istnieje
-                    font = ImageFont.load_default()
-                else:
-                    font = ImageFont.truetype(font_path, 16)
-            except Exception:
-                # W przypadku błędu ładowania czcionki, użyj domyślnej
-                font = ImageFont.load_default()
-
-            for point in self.points_data:
-                x, y = point["x"], point["y"]
-                name = point["name"]
-                speed = point.get("speed", "") # Pobierz prędkość, domyślnie pusty string jeśli brak
-
-                # Rysuj kółko symbolizujące punkt
-                radius = 5
-                draw.ellipse((x - radius, y - radius, x + radius, y + radius),
-                             fill=(255, 0, 0, 180), # Czerwony, półprzezroczysty
-                             outline=(255, 255, 255, 255)) # Biała obwódka
-
-                # Rysuj tekst (nazwa i prędkość)
-                text_to_draw = f"{name}\n({speed})"
-                # Oblicz rozmiar tekstu dla centrowania
-                bbox = draw.textbbox((0,0), text_to_draw, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-
-                text_x = x - text_width / 2
-                text_y = y + radius + 2 # Przesunięcie poniżej kółka
-
-                # Rysuj tekst z obwódką (dla lepszej czytelności)
-                outline_width = 1
-                for dx in range(-outline_width, outline_width + 1):
-                    for dy in range(-outline_width, outline_width + 1):
-                        if dx != 0 or dy != 0:
-                            draw.text((text_x + dx, text_y + dy), text_to_draw, font=font, fill=(0, 0, 0, 255)) # Czarna obwódka
-                draw.text((text_x, text_y), text_to_draw, font=font, fill=(255, 255, 0, 255)) # Żółty tekst
-
-            # Konwertuj obraz PIL na QPixmap do wyświetlenia w QLabel
-            qimage = ImageQt(display_image)
-            self.current_display_pixmap = QPixmap.fromImage(qimage)
-            self.image_label.setPixmap(self.current_display_pixmap)
-        else:
-            self.image_label.clear() # Wyczyść etykietę, jeśli nie ma obrazu
-
+        self.map_view.set_image(self.original_image)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
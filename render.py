@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import argparse
+import datetime
+import assets
+from renderers import RenderJob, load_job, save_job, render_map
+from renderers.batch import export_batch, load_presets
+from renderers.export import DEFAULT_PROFILE, EXPORT_PROFILES, export_image, get_profile, with_extension
+from renderers.output_cache import CACHE_DIR, DEFAULT_MAX_BYTES, OutputCache, export_cached
+from renderers.profiling import RenderReport
+from renderers.tiled import render_tiled
+from renderers.watch import MapWatcher
+from renderers.xyz import XYZ_TILE_SIZE, export_tiles
+
+
+def default_output_path(profile_name=DEFAULT_PROFILE):
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return with_extension(os.path.join("output", f"custom_map_{timestamp}"), profile_name)
+
+
+def watch(settings_path, output_path, profile_name, interval):
+    """
+    Obserwuje plik ustawień, mapę, czcionki i pliki warstw; po każdej zmianie
+    łata poprzedni wynik (renderers.watch) i zapisuje go ponownie pod tą samą
+    ścieżką. Błędy (np. plik warstwy w trakcie zapisu) są wypisywane raz, a
+    obserwowanie trwa dalej. Kończy się przez Ctrl+C.
+    """
+    watcher = MapWatcher()
+    job = None
+    settings_signature = None
+    last_error = None
+    dirty = True
+    print(f"Obserwuję pliki mapy (co {interval:g} s) - Ctrl+C kończy")
+    try:
+        while True:
+            try:
+                signature = assets.file_signature(settings_path) if settings_path else None
+                if settings_path and signature != settings_signature:
+                    job = load_job(settings_path)
+                    settings_signature = signature
+                    dirty = True
+                elif job is None:
+                    job = RenderJob()
+                if dirty or watcher.changed(job):
+                    start = time.perf_counter()
+                    image, rects = watcher.update(job)
+                    result = export_image(image, output_path, profile_name)
+                    dirty = False
+                    last_error = None
+                    print(f"Zapisano jako: {result.summary()} - przerysowane obszary: {len(rects)}, "
+                          f"razem {time.perf_counter() - start:.2f} s")
+            except Exception as e:
+                if str(e) != last_error:
+                    print(f"Błąd: {e}")
+                    last_error = str(e)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renderuje mapę z pliku ustawień, bez uruchamiania GUI.")
+    parser.add_argument("settings", nargs="?", help="Plik JSON z ustawieniami mapy i sekcji")
+    parser.add_argument("-o", "--output",
+                        help=f"Ścieżka pliku wynikowego (domyślnie bufor {CACHE_DIR} - to samo zlecenie nie jest renderowane ponownie)")
+    parser.add_argument("--profile", choices=sorted(EXPORT_PROFILES), default=DEFAULT_PROFILE,
+                        help="Format i kompresja pliku wynikowego: " + "; ".join(
+                            f"{name} - {profile.description}" for name, profile in EXPORT_PROFILES.items()))
+    parser.add_argument("--tiled", action="store_true",
+                        help="Renderuj kafelkami i zapisuj PNG strumieniowo (dla bardzo dużych map)")
+    parser.add_argument("--tile-size", type=int, default=1024, help="Rozmiar kafelka w trybie --tiled")
+    parser.add_argument("--xyz", metavar="DIR",
+                        help="Zapisz mapę jako piramidę kafelków z/x/y do katalogu DIR (zapisuje tylko zmienione kafelki)")
+    parser.add_argument("--xyz-tile-size", type=int, default=XYZ_TILE_SIZE, help="Rozmiar kafelka w trybie --xyz")
+    parser.add_argument("--batch", metavar="PRESETS",
+                        help="Plik JSON z listą wariantów stylu - renderuje wszystkie równolegle")
+    parser.add_argument("--workers", type=int, help="Liczba procesów w trybie --batch (domyślnie liczba rdzeni)")
+    parser.add_argument("--report", metavar="PATH",
+                        help="Zapisz raport JSON z czasami etapów (dekodowanie, sekcje, składanie, zapis) i pamięcią")
+    parser.add_argument("--trace", action="store_true",
+                        help="Dodaj do raportu cProfile i tracemalloc (wolniej); statystyki cProfile trafiają do pliku .prof obok raportu")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), metavar="MB",
+                        help="Największy rozmiar bufora gotowych map; najdawniej używane mapy są usuwane")
+    parser.add_argument("--watch", action="store_true",
+                        help="Obserwuj pliki mapy i warstw i po zmianie przerysuj tylko zmienione obiekty")
+    parser.add_argument("--interval", type=float, default=1.0, help="Co ile sekund sprawdzać pliki w trybie --watch")
+    parser.add_argument("--write-default", metavar="PATH", help="Zapisz domyślne ustawienia do pliku i zakończ")
+    args = parser.parse_args(argv)
+
+    if args.tiled and get_profile(args.profile).format != "PNG":
+        parser.error("--tiled zapisuje tylko PNG - wybierz profil png, png-fast lub png-small")
+    if args.tile_size <= 0 or args.xyz_tile_size <= 0:
+        parser.error("rozmiar kafelka musi być dodatni")
+    if args.tiled and args.xyz:
+        parser.error("--tiled i --xyz wykluczają się")
+    if args.watch and (args.tiled or args.xyz or args.batch):
+        parser.error("--watch nie działa z --tiled, --xyz ani --batch")
+
+    if args.write_default:
+        save_job(RenderJob(), args.write_default)
+        print(f"Zapisano domyślne ustawienia: {args.write_default}")
+        return 0
+
+    if args.batch:
+        start = time.perf_counter()
+        results = export_batch(load_presets(args.batch, args.profile), workers=args.workers,
+                               profile_name=args.profile)
+        for name, seconds, result in results:
+            print(f"{name}: {result.summary()}, razem {seconds:.2f} s")
+        print(f"Wyrenderowano {len(results)} wariantów w {time.perf_counter() - start:.2f} s")
+        return 0
+
+    if args.watch:
+        output_path = with_extension(args.output, args.profile) if args.output else default_output_path(args.profile)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        return watch(args.settings, output_path, args.profile, args.interval)
+
+    job = load_job(args.settings) if args.settings else RenderJob()
+    # Bez -o zwykły eksport trafia do bufora adresowanego zawartością
+    use_cache = not (args.output or args.xyz or args.tiled)
+    if args.xyz:
+        output_path = args.xyz
+    elif use_cache:
+        output_path = None
+    else:
+        output_path = with_extension(args.output, args.profile) if args.output else default_output_path(args.profile)
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    report = RenderReport(trace=args.trace)
+    with report.activate():
+        if args.xyz:
+            result = export_tiles(job, args.xyz, tile_size=args.xyz_tile_size, profile_name=args.profile)
+        elif args.tiled:
+            result = render_tiled(job, output_path, tile_size=args.tile_size, profile_name=args.profile)
+        elif use_cache:
+            result = export_cached(job, OutputCache(max_bytes=args.cache_size * 1024 * 1024), args.profile)
+            output_path = result.path
+        else:
+            result = export_image(render_map(job), output_path, args.profile)
+    print(f"Zapisano jako: {result.summary()}")
+
+    report_path = args.report or (os.path.splitext(output_path)[0] + "_report.json" if args.trace else None)
+    if report_path:
+        report.info.update({
+            "settings": args.settings,
+            "map": job.map_path,
+            "output": output_path,
+            "profile": args.profile,
+            "tiled": args.tiled,
+            "xyz": bool(args.xyz),
+            "bytes": getattr(result, "bytes", None),
+            "cached": getattr(result, "cached", False),
+            "sections": [settings.name for settings in job.sections if settings.enabled],
+        })
+        report.save(report_path)
+        if args.trace:
+            report.save_profile(os.path.splitext(report_path)[0] + ".prof")
+        print(f"Pomiary: {report.summary()}")
+        print(f"Raport: {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Renderowanie map bez Qt. Moduły w tym pakiecie nie importują PyQt6, dzięki
+czemu mapy można generować na serwerach bez środowiska graficznego.
+
+Nazwy pakietu są importowane z modułów dopiero przy pierwszym użyciu, więc
+`import renderers.export` nie wczytuje wszystkich rendererów ani Pillow
+(krótszy start okna main.py).
+"""
+import importlib
+
+_EXPORTS = {
+    "SectionRenderer": "base", "SectionSettings": "base",
+    "CoverageRenderer": "coverage", "CoverageSettings": "coverage",
+    "DistrictsRenderer": "districts", "DistrictsSettings": "districts",
+    "SpeedCamerasRenderer": "speed_cameras", "SpeedCamerasSettings": "speed_cameras",
+    "LayerCache": "layers",
+    "RenderCancelled": "pipeline", "RenderJob": "pipeline", "compose": "pipeline", "get_renderer": "pipeline",
+    "load_job": "pipeline", "save_job": "pipeline", "render_map": "pipeline",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,149 @@
+import math
+from dataclasses import asdict, dataclass, fields
+
+
+def check_path(key, value):
+    """
+    Ścieżki pliku z JSON muszą być niepustymi napisami: liczba trafiłaby do
+    open() jako deskryptor pliku i zamknęłaby np. gniazdo usługi.
+    """
+    if not isinstance(value, str) or not value:
+        raise ValueError(f"pole '{key}' musi być niepustą ścieżką pliku")
+    return value
+
+
+class SectionSettings:
+    """
+    Bazowa klasa ustawień sekcji. Podklasy są dataclassami z samymi danymi
+    (bez widgetów Qt), więc można je zapisać do JSON i renderować bez GUI.
+    """
+    name = ""
+
+    @classmethod
+    def from_dict(cls, data):
+        known = {f.name for f in fields(cls)}
+        kwargs = {}
+        for key, value in data.items():
+            if key in known:
+                if key.endswith("_path"):
+                    check_path(key, value)
+                # Kolory w JSON są listami, w ustawieniach trzymamy krotki
+                kwargs[key] = tuple(value) if isinstance(value, list) else value
+        return cls(**kwargs)
+
+    def to_dict(self):
+        data = {"name": self.name}
+        for key, value in asdict(self).items():
+            data[key] = list(value) if isinstance(value, tuple) else value
+        return data
+
+
+@dataclass(frozen=True)
+class Viewport:
+    """
+    Przekształcenie współrzędnych mapy (z plików JSON) na piksele obrazu,
+    na którym rysuje renderer. Skala < 1 służy do szybkiego podglądu, a
+    przesunięcie (left, top) do renderowania pojedynczych kafelków mapy.
+    """
+    scale: float = 1.0
+    left: float = 0
+    top: float = 0
+
+    def point(self, x, y):
+        return (x - self.left) * self.scale, (y - self.top) * self.scale
+
+    def length(self, value, minimum=0):
+        return max(minimum, round(value * self.scale))
+
+    def map_rect(self, size):
+        """Prostokąt (x0, y0, x1, y1) mapy widoczny na obrazie o rozmiarze `size`."""
+        return (self.left, self.top,
+                self.left + size[0] / self.scale, self.top + size[1] / self.scale)
+
+
+# Tolerancja błędu zaokrągleń float przy zaokrąglaniu do piksela: w pomniejszonym
+# fragmencie (x - left) * scale różni się od x * scale - przesunięcie o ~1e-13
+PIXEL_EPSILON = 1e-9
+
+
+def pixel(value):
+    """
+    Zaokrągla współrzędną do piksela, połówki zawsze w górę. round() zaokrągla
+    połówki do parzystej, więc wynik zależałby od przesunięcia kafelka; bez
+    tolerancji połówka w podglądzie mogłaby zaokrąglić się raz w górę, raz w dół.
+    """
+    return math.floor(value + 0.5 + PIXEL_EPSILON)
+
+
+def rects_intersect(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def bounds_reach(reach, bounds, x, y):
+    """Poszerza zasięg `reach` (w lewo, w górę, w prawo, w dół) o prostokąt `bounds` obiektu w punkcie (x, y)."""
+    return (max(reach[0], x - bounds[0]), max(reach[1], y - bounds[1]),
+            max(reach[2], bounds[2] - x), max(reach[3], bounds[3] - y))
+
+
+class SectionRenderer:
+    """Renderer warstwy mapy niezależny od Qt."""
+    name = ""
+    settings_class = SectionSettings
+    # Pola ustawień, od których zależą prostokąty feature_bounds - tylko one
+    # (i plik danych) unieważniają bufor features.load_feature_store
+    bounds_fields = ()
+
+    def feature_bounds(self, settings, feature):
+        """
+        Prostokąt (x0, y0, x1, y1) we współrzędnych mapy, który obejmuje
+        wszystko, co renderer rysuje dla `feature`. Służy do pomijania
+        obiektów spoza renderowanego fragmentu mapy.
+        """
+        raise NotImplementedError
+
+    def feature_reach(self, settings, features):
+        """
+        Zasięg (w lewo, w górę, w prawo, w dół) prostokątów `feature_bounds`
+        od punktów zaczepienia (x, y) obiektów `features` - wystarcza do
+        zapytań o obiekty z pliku .feat, który indeksuje tylko punkty.
+        Domyślnie sprawdza każdy obiekt; podklasy liczą go z różnych wartości
+        kolumn (features.distinct), bez przeglądania całego pliku.
+        """
+        reach = (0, 0, 0, 0)
+        for feature in features:
+            reach = bounds_reach(reach, self.feature_bounds(settings, feature), feature["x"], feature["y"])
+        return reach
+
+    def labels(self, settings):
+        """
+        Podpisy (labels.Label) do automatycznego rozmieszczenia, we
+        współrzędnych mapy. Domyślnie sekcja nie ma podpisów.
+        """
+        return []
+
+    def render(self, image, draw, settings, viewport=None, placements=None):
+        """
+        Rysuje sekcję na `image`. `placements` to {indeks obiektu: Placement
+        albo None (ukryty podpis)} z labels.place_labels; None oznacza podpisy
+        w ich stałych pozycjach.
+        """
+        raise NotImplementedError
+
+
+def alpha_composite_at(image, overlay, left, top):
+    """
+    Nakłada `overlay` na `image` w punkcie (left, top), dotykając tylko
+    obszaru nakładki. Fragmenty wystające poza obraz są obcinane.
+    """
+    left, top = int(left), int(top)
+    src_left = max(0, -left)
+    src_top = max(0, -top)
+    src_right = min(overlay.width, image.width - left)
+    src_bottom = min(overlay.height, image.height - top)
+    if src_right <= src_left or src_bottom <= src_top:
+        return
+    image.alpha_composite(
+        overlay,
+        dest=(left + src_left, top + src_top),
+        source=(src_left, src_top, src_right, src_bottom)
+    )
@@ -0,0 +1,95 @@
+"""
+Eksport wielu wariantów (stylów) tej samej mapy naraz. Mapa bazowa jest
+dekodowana raz i udostępniana procesom roboczym przez pamięć współdzieloną
+(tylko do odczytu); każdy proces renderuje i koduje swoje warianty.
+"""
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from PIL import Image
+import assets
+from .export import DEFAULT_PROFILE, export_image, with_extension
+from .pipeline import RenderCancelled, RenderJob, compose, job_placements
+
+# Mapa bazowa widziana przez proces roboczy (ustawiana w init_worker)
+_shared_base = None
+_shared_memory = None
+
+
+def load_presets(path, profile_name=DEFAULT_PROFILE):
+    """
+    Wczytuje plik z wariantami:
+    {"map": "...", "presets": [{"name": "...", "output": "...", "sections": [...]}, ...]}
+    Zwraca listę (nazwa, RenderJob, ścieżka wyjściowa). Domyślna ścieżka
+    wyjściowa ma rozszerzenie zgodne z profilem `profile_name`.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    presets = []
+    for preset in data["presets"]:
+        job = RenderJob.from_dict({"map": data.get("map", RenderJob.map_path), **preset})
+        output_path = with_extension(preset.get("output") or os.path.join("output", preset["name"]), profile_name)
+        presets.append((preset["name"], job, output_path))
+    return presets
+
+
+def init_worker(memory_name, size):
+    global _shared_base, _shared_memory
+    _shared_memory = shared_memory.SharedMemory(name=memory_name)
+    _shared_base = Image.frombuffer("RGBA", size, _shared_memory.buf, "raw", "RGBA", 0, 1)
+
+
+def render_variant(name, job_data, output_path, profile_name):
+    """
+    Renderuje jeden wariant na współdzielonej mapie i zapisuje go.
+    Wywoływane w procesie roboczym; zwraca (nazwa, czas, ExportResult).
+    """
+    start = time.perf_counter()
+    job = RenderJob.from_dict(job_data)
+    image = compose(_shared_base, job.sections, placements=job_placements(job))
+    result = export_image(image, output_path, profile_name)
+    return name, time.perf_counter() - start, result
+
+
+def export_batch(presets, workers=None, progress=None, is_cancelled=None, profile_name=DEFAULT_PROFILE):
+    """
+    Renderuje warianty `presets` (jak z load_presets) równolegle na `workers`
+    procesach (domyślnie liczba rdzeni). Wszystkie warianty muszą używać tej
+    samej mapy bazowej. Zwraca listę (nazwa, łączny czas, ExportResult).
+    """
+    if not presets:
+        return []
+    map_paths = {job.map_path for _, job, _ in presets}
+    if len(map_paths) != 1:
+        raise ValueError("Wszystkie warianty muszą używać tej samej mapy bazowej")
+
+    base = assets.load_map(map_paths.pop())
+    data = base.tobytes()
+    memory = shared_memory.SharedMemory(create=True, size=len(data))
+    try:
+        memory.buf[:len(data)] = data
+        del data
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(memory.name, base.size)) as pool:
+            futures = {pool.submit(render_variant, name, job.to_dict(), output_path, profile_name): order
+                       for order, (name, job, output_path) in enumerate(presets)}
+            try:
+                for done, future in enumerate(as_completed(futures)):
+                    if is_cancelled and is_cancelled():
+                        raise RenderCancelled()
+                    results[futures[future]] = future.result()
+                    if progress:
+                        progress(done, len(futures), results[futures[future]][0])
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        return [results[order] for order in sorted(results)]
+    finally:
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,150 @@
+"""
+Warstwa pokrycia fotoradarami: mapa cieplna, w której zasięgi nachodzących
+na siebie fotoradarów się sumują (zamiast nakładać kolejne półprzezroczyste
+kółka). Pole gęstości jest liczone w zmniejszonej rozdzielczości dla wszystkich
+fotoradarów naraz (NumPy): punkty są rozkładane na siatkę, a siatka splatana
+z jądrem przez FFT, więc czas prawie nie zależy od liczby fotoradarów. Wynik
+jest raz powiększany, barwiony tablicą kolorów i nakładany jednym złożeniem.
+
+NumPy jest importowane dopiero przy renderowaniu - import pakietu renderers
+(i start main.py) nie płaci za nie, dopóki sekcja jest wyłączona.
+"""
+import os
+import math
+from dataclasses import dataclass
+from PIL import Image
+from .base import SectionRenderer, SectionSettings, Viewport
+from .features import FileFeatureStore, load_feature_store
+from .profiling import record_error
+
+
+@dataclass
+class CoverageSettings(SectionSettings):
+    name = "coverage"
+
+    enabled: bool = False
+    data_path: str = "resources/speed_cameras.json"
+    radius: int = 60
+    cell_size: int = 8
+    saturation: float = 3.0
+    opacity: int = 170
+    low_color: tuple = (255, 210, 0)
+    high_color: tuple = (220, 0, 0)
+
+
+def color_ramp(settings):
+    """Tablica 256 kolorów RGBA: od przezroczystego `low_color` do `high_color` z krycia `opacity`."""
+    import numpy as np
+    t = np.linspace(0.0, 1.0, 256)[:, None]
+    low = np.asarray(settings.low_color[:3], dtype=np.float64)
+    high = np.asarray(settings.high_color[:3], dtype=np.float64)
+    rgb = low + (high - low) * t
+    alpha = settings.opacity * t
+    return np.rint(np.hstack([rgb, alpha])).astype(np.uint8)
+
+
+def kernel(radius, cell_size):
+    """Jądro (1 - (d/r)^2)^2 na siatce komórek `cell_size`, o wartości 1 w środku."""
+    import numpy as np
+    reach = math.ceil(radius / cell_size)
+    offsets = np.arange(-reach, reach + 1) * cell_size
+    distance2 = (offsets[None, :] ** 2 + offsets[:, None] ** 2) / (radius * radius)
+    return np.where(distance2 < 1.0, (1.0 - distance2) ** 2, 0.0), reach
+
+
+def density_field(xs, ys, origin, shape, radius, cell_size):
+    """
+    Suma jąder wszystkich punktów w środkach komórek siatki `shape` (wiersze,
+    kolumny) o początku `origin`. Punkty (xs, ys) i promień są w pikselach
+    obrazu; każdy punkt jest rozkładany dwuliniowo na cztery sąsiednie komórki.
+    """
+    import numpy as np
+    rows, columns = shape
+    fx = (xs - origin[0]) / cell_size - 0.5
+    fy = (ys - origin[1]) / cell_size - 0.5
+    x0, y0 = np.floor(fx), np.floor(fy)
+    wx, wy = fx - x0, fy - y0
+    x0, y0 = x0.astype(np.int64), y0.astype(np.int64)
+
+    grid = np.zeros(rows * columns)
+    for dx, dy, weight in ((0, 0, (1 - wx) * (1 - wy)), (1, 0, wx * (1 - wy)),
+                           (0, 1, (1 - wx) * wy), (1, 1, wx * wy)):
+        cx, cy = x0 + dx, y0 + dy
+        inside = (cx >= 0) & (cx < columns) & (cy >= 0) & (cy < rows)
+        grid += np.bincount(cy[inside] * columns + cx[inside], weights=weight[inside], minlength=rows * columns)
+    grid = grid.reshape(rows, columns)
+
+    weights, reach = kernel(radius, cell_size)
+    size = (rows + 2 * reach, columns + 2 * reach)
+    field = np.fft.irfft2(np.fft.rfft2(grid, size) * np.fft.rfft2(weights, size), size)
+    return field[reach:reach + rows, reach:reach + columns]
+
+
+class CoverageRenderer(SectionRenderer):
+    name = "coverage"
+    settings_class = CoverageSettings
+    bounds_fields = ("radius",)
+
+    def feature_bounds(self, settings, feature):
+        # Zasięg jądra plus rozmycie przez siatkę: rozkład punktu na komórki i powiększanie
+        # sięgają razem do dwóch komórek, a komórka ma najwyżej pół promienia
+        x, y, reach = feature["x"], feature["y"], 2 * settings.radius
+        return (x - reach, y - reach, x + reach, y + reach)
+
+    def feature_reach(self, settings, features):
+        return (2 * settings.radius,) * 4
+
+    def points(self, store, rect):
+        """Współrzędne (xs, ys) obiektów, które mogą sięgać `rect` - z pliku .feat bez tworzenia słowników."""
+        import numpy as np
+        if isinstance(store, FileFeatureStore):
+            reach, file = store.reach, store.features
+            indices = np.asarray(file.query((rect[0] - reach[2], rect[1] - reach[3],
+                                             rect[2] + reach[0], rect[3] + reach[1])), dtype=np.int64)
+            return (np.asarray(file.columns["x"][1], dtype=np.float64)[indices],
+                    np.asarray(file.columns["y"][1], dtype=np.float64)[indices])
+        found = store.query(rect)
+        return (np.fromiter((feature["x"] for _, feature in found), np.float64, len(found)),
+                np.fromiter((feature["y"] for _, feature in found), np.float64, len(found)))
+
+    def render(self, image, draw, settings, viewport=None, placements=None):
+        viewport = viewport or Viewport()
+        try:
+            import numpy as np
+            if not os.path.exists(settings.data_path):
+                record_error(self.name, f"[CoverageSection] Błąd: Plik '{settings.data_path}' nie istnieje. Nie można wyrenderować pokrycia.")
+                return
+            store = load_feature_store(self, settings)
+
+            radius = settings.radius * viewport.scale
+            if radius <= 0:
+                return
+            # Przynajmniej dwie komórki na promień, żeby jądro nie zdegenerowało się w podglądzie.
+            # Komórka ma całkowitą liczbę pikseli, więc siatka wypada tak samo w każdym
+            # fragmencie obrazu (kafelek, łatka trybu obserwowania) co w całym obrazie
+            cell = max(1, min(settings.cell_size, math.floor(radius / 2)))
+
+            xs, ys = self.points(store, viewport.map_rect(image.size))
+            if not len(xs):
+                return
+
+            # Siatka jest zaczepiona w stałym miejscu układu mapy (a nie w rogu obrazu),
+            # więc kafelki mapy liczą pole w tych samych komórkach i stykają się bez szwów
+            left, top = viewport.left * viewport.scale, viewport.top * viewport.scale
+            pad = math.ceil(radius / cell) + 1
+            origin = (math.floor(left / cell - pad) * cell, math.floor(top / cell - pad) * cell)
+            shape = (math.ceil((top + image.height - origin[1]) / cell) + pad,
+                     math.ceil((left + image.width - origin[0]) / cell) + pad)
+
+            field = density_field(xs * viewport.scale, ys * viewport.scale, origin, shape, radius, cell)
+            levels = np.rint(np.clip(field / settings.saturation, 0.0, 1.0) * 255).astype(np.uint8)
+
+            x0, y0 = (left - origin[0]) / cell, (top - origin[1]) / cell
+            levels = Image.fromarray(levels).resize(
+                image.size, Image.Resampling.BILINEAR,
+                box=(x0, y0, x0 + image.width / cell, y0 + image.height / cell))
+            overlay = Image.merge("RGBA", [levels.point(channel.tolist()) for channel in color_ramp(settings).T])
+            image.alpha_composite(overlay)
+
+        except Exception as e:
+            record_error(self.name, f"[CoverageSection] Błąd: {e}")
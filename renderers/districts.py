@@ -0,0 +1,129 @@
+import textwrap
+from dataclasses import dataclass
+from functools import lru_cache
+import assets
+from .base import SectionRenderer, SectionSettings, Viewport, bounds_reach
+from .features import load_feature_store
+from .labels import NO_PLACEMENT, Label, expand_rect, placement_margin
+from .profiling import record_error
+from .text import draw_text
+
+LINE_SPACING = 4
+
+
+@dataclass
+class DistrictsSettings(SectionSettings):
+    name = "districts"
+
+    enabled: bool = True
+    data_path: str = "resources/districts.json"
+    font_path: str = "resources/Fredoka-Bold.ttf"
+    font_size: int = 18
+    wrap_limit: int = 8
+    outline_width: int = 1
+    text_color: tuple = (255, 255, 255)
+    outline_color: tuple = (0, 0, 0)
+    label_priority: int = 0
+
+
+def wrap_name(name, wrap_limit):
+    return textwrap.wrap(
+        name,
+        width=wrap_limit,
+        break_long_words=False,
+        break_on_hyphens=False
+    )
+
+
+# Więcej niż nazw dzielnic na dużej mapie - przy mniejszym buforze kolejne przebiegi
+# po wszystkich obiektach wypychałyby wpisy, zanim zostaną użyte ponownie
+@lru_cache(maxsize=65536)
+def layout_name(name, font, wrap_limit):
+    """
+    Układ podpisu dzielnicy: krotka (wiersz, szerokość wiersza) po zawinięciu
+    nazwy. `font` z `assets.load_font` odpowiada jednemu plikowi i rozmiarowi,
+    więc klucz obejmuje nazwę, czcionkę, rozmiar i limit zawijania.
+    """
+    return tuple((line, font.getlength(line)) for line in wrap_name(name, wrap_limit))
+
+
+class DistrictsRenderer(SectionRenderer):
+    name = "districts"
+    settings_class = DistrictsSettings
+    bounds_fields = ("font_path", "font_size", "wrap_limit", "outline_width")
+
+    def feature_bounds(self, settings, feature):
+        font = assets.load_font(settings.font_path, settings.font_size)
+        lines = layout_name(feature["name"], font, settings.wrap_limit)
+        text_width = max((width for _, width in lines), default=0)
+
+        total_height = len(lines) * (settings.font_size + LINE_SPACING)
+        start_y = feature["y"] - total_height // 2
+        # Zapas na obwódkę i części liter wystające poza wysokość wiersza
+        margin = settings.outline_width + settings.font_size // 2
+        return (feature["x"] - text_width / 2 - margin, start_y - margin,
+                feature["x"] + text_width / 2 + margin, start_y + total_height + margin)
+
+    def feature_reach(self, settings, features):
+        # Prostokąt zależy tylko od nazwy - wystarczy sprawdzić każdą nazwę raz
+        reach = (0, 0, 0, 0)
+        for name in features.distinct("name"):
+            reach = bounds_reach(reach, self.feature_bounds(settings, {"name": name, "x": 0, "y": 0}), 0, 0)
+        return reach
+
+    def labels(self, settings):
+        font = assets.load_font(settings.font_path, settings.font_size)
+        outline = settings.outline_width
+        labels = []
+        for index, feature in load_feature_store(self, settings).features.items():
+            lines = layout_name(feature["name"], font, settings.wrap_limit)
+            if not lines:
+                continue
+            text_width = max(width for _, width in lines)
+            total_height = len(lines) * (settings.font_size + LINE_SPACING)
+            start_y = feature["y"] - total_height // 2
+            bounds = (feature["x"] - text_width / 2 - outline, start_y - outline,
+                      feature["x"] + text_width / 2 + outline, start_y + total_height + outline)
+            labels.append(Label((self.name, index), bounds, settings.label_priority + feature.get("priority", 0)))
+        return labels
+
+    def render(self, image, draw, settings, viewport=None, placements=None):
+        viewport = viewport or Viewport()
+        try:
+            store = load_feature_store(self, settings)
+
+            font_size = settings.font_size
+            outline_width = viewport.length(settings.outline_width, minimum=min(1, settings.outline_width))
+            text_color = tuple(settings.text_color[:3])
+            outline_color = tuple(settings.outline_color[:3])
+
+            fonts = {}
+            # Przesunięte podpisy mogą wystawać poza prostokąty obiektów w indeksie
+            rect = expand_rect(viewport.map_rect(image.size), placement_margin(placements))
+
+            for index, district in store.query(rect):
+                placement = placements.get(index, NO_PLACEMENT) if placements is not None else NO_PLACEMENT
+                if placement is None:
+                    continue
+                name = district["name"]
+                x, y = district["x"] + placement.dx, district["y"] + placement.dy
+                line_height = (font_size + LINE_SPACING) * placement.scale
+                font = fonts.get(placement.scale)
+                if font is None:
+                    font = fonts[placement.scale] = assets.load_font(
+                        settings.font_path, viewport.length(font_size * placement.scale, minimum=1))
+
+                # Szerokości wierszy mierzone czcionką w skali obrazu, pozycję liczymy w skali mapy
+                lines = layout_name(name, font, settings.wrap_limit)
+
+                total_height = len(lines) * line_height
+                start_y = y - total_height // 2
+
+                for i, (line, text_width) in enumerate(lines):
+                    line_x, line_y = viewport.point(x, start_y + i * line_height)
+                    line_x -= text_width / 2
+
+                    draw_text(image, (line_x, line_y), line, font, outline_width, text_color, outline_color)
+
+        except Exception as e:
+            record_error(self.name, f"[DistrictsSection] Błąd: {e}")
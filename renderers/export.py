@@ -0,0 +1,95 @@
+"""
+Zapis gotowej mapy do pliku. Profile pozwalają wybrać format i kompromis
+między czasem kodowania a rozmiarem pliku; każdy zapis zwraca czas i
+rozmiar, żeby można było porównać profile na własnych mapach.
+"""
+import os
+import time
+from dataclasses import dataclass, field
+from .profiling import stage
+
+
+@dataclass(frozen=True)
+class ExportProfile:
+    format: str
+    extension: str
+    options: dict = field(default_factory=dict)
+    supports_alpha: bool = True
+    description: str = ""
+
+
+EXPORT_PROFILES = {
+    "png-fast": ExportProfile("PNG", ".png", {"compress_level": 1},
+                              description="PNG, najszybsze kodowanie, większy plik"),
+    "png": ExportProfile("PNG", ".png", {"compress_level": 6},
+                         description="PNG, ustawienia domyślne"),
+    "png-small": ExportProfile("PNG", ".png", {"compress_level": 9, "optimize": True},
+                               description="PNG, najmniejszy plik, najwolniejsze kodowanie"),
+    "webp-lossless": ExportProfile("WEBP", ".webp", {"lossless": True, "quality": 80, "method": 4},
+                                   description="WebP bezstratny"),
+    "webp": ExportProfile("WEBP", ".webp", {"quality": 85, "method": 4},
+                          description="WebP stratny (podglądy)"),
+    "jpeg": ExportProfile("JPEG", ".jpg", {"quality": 85, "optimize": True}, supports_alpha=False,
+                          description="JPEG (podglądy, bez przezroczystości)"),
+}
+DEFAULT_PROFILE = "png"
+
+
+@dataclass
+class ExportResult:
+    path: str
+    profile: str
+    seconds: float
+    bytes: int
+    dropped_alpha: bool
+    cached: bool = False
+
+    def summary(self):
+        if self.cached:
+            return f"{self.path} [{self.profile}]: {self.bytes / 1024 / 1024:.2f} MB, z bufora (bez renderowania)"
+        return (f"{self.path} [{self.profile}]: {self.bytes / 1024 / 1024:.2f} MB, "
+                f"kodowanie {self.seconds:.2f} s")
+
+
+def get_profile(name):
+    try:
+        return EXPORT_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Nieznany profil eksportu: '{name}'") from None
+
+
+def with_extension(path, profile_name):
+    """Zamienia rozszerzenie `path` na rozszerzenie formatu profilu."""
+    return os.path.splitext(path)[0] + get_profile(profile_name).extension
+
+
+def is_opaque(image):
+    if "A" not in image.getbands():
+        return True
+    return image.getchannel("A").getextrema() == (255, 255)
+
+
+def export_image(image, output_path, profile_name=DEFAULT_PROFILE):
+    """
+    Zapisuje `image` profilem `profile_name` i zwraca ExportResult. Kanał
+    alfa jest pomijany, gdy obraz jest w pełni nieprzezroczysty albo format
+    go nie obsługuje - mniej danych do zakodowania i mniejszy plik.
+    """
+    profile = get_profile(profile_name)
+    start = time.perf_counter()
+
+    with stage("encode"):
+        dropped_alpha = image.mode == "RGBA" and (not profile.supports_alpha or is_opaque(image))
+        if dropped_alpha:
+            image = image.convert("RGB")
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        image.save(output_path, format=profile.format, **profile.options)
+
+    return ExportResult(
+        path=output_path,
+        profile=profile_name,
+        seconds=time.perf_counter() - start,
+        bytes=os.path.getsize(output_path),
+        dropped_alpha=dropped_alpha,
+    )
@@ -0,0 +1,343 @@
+"""
+Binarny, kolumnowy format obiektów warstw (.feat) - odpowiednik
+districts.json / speed_cameras.json dla zbiorów setek tysięcy punktów.
+
+Plik jest mapowany w pamięci (mmap) i niczego nie wczytuje z góry: każde
+pole obiektów to osobna tablica (liczby całkowite int32, zmiennoprzecinkowe
+float64 albo indeksy do wspólnej tablicy napisów, w której każda nazwa i
+prędkość występuje raz), a indeks siatkowy punktów zaczepienia (x, y) jest
+zapisany w pliku, więc zapytanie o prostokąt nie przegląda wszystkich obiektów.
+
+Układ pliku: MAGIC, długość nagłówka (uint32), nagłówek JSON z opisem kolumn
+i przesunięciami tablic, a za nim tablice (little-endian, wyrównane do 8 bajtów).
+
+Konwersja z JSON:
+    python -m renderers.feature_file resources/speed_cameras.json
+"""
+import os
+import sys
+import json
+import math
+import mmap
+import struct
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+
+MAGIC = b"PRPGFEAT"
+VERSION = 1
+FEATURE_EXTENSION = ".feat"
+DEFAULT_CELL_SIZE = 256
+
+# Indeks w tablicy napisów oznaczający brak wartości w danym obiekcie
+MISSING = 0xFFFFFFFF
+
+INT32_RANGE = (-2 ** 31, 2 ** 31 - 1)
+
+
+def column_kind(name, values):
+    """
+    Typ kolumny: "i" (int32), "d" (float64), "di" (liczby całkowite z brakami,
+    zapisane jako float64) albo "s" (napis z tablicy napisów).
+    """
+    present = [value for value in values if value is not None]
+    if all(isinstance(value, str) for value in present):
+        return "s"
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        if all(isinstance(value, int) for value in present) \
+                and all(INT32_RANGE[0] <= value <= INT32_RANGE[1] for value in present):
+            # Braki wartości są zapisywane jako NaN, więc wymagają kolumny float64
+            return "i" if len(present) == len(values) else "di"
+        return "d"
+    raise ValueError(f"Pole '{name}' musi zawierać same liczby albo same napisy")
+
+
+def build_index(xs, ys, cell_size):
+    """
+    Indeks siatkowy punktów: posortowane klucze zajętych komórek, początki ich
+    list w tablicy `items` i same indeksy obiektów (kolejno komórka po komórce).
+    """
+    if not xs:
+        return (0, 0, 1), array("q"), array("I", [0]), array("I")
+    cells_x = [math.floor(x / cell_size) for x in xs]
+    cells_y = [math.floor(y / cell_size) for y in ys]
+    min_x, min_y = min(cells_x), min(cells_y)
+    width = max(cells_x) - min_x + 1
+
+    keys = [(cy - min_y) * width + (cx - min_x) for cx, cy in zip(cells_x, cells_y)]
+    items = sorted(range(len(keys)), key=keys.__getitem__)
+    cell_keys, cell_starts = array("q"), array("I")
+    for position, index in enumerate(items):
+        if not cell_keys or cell_keys[-1] != keys[index]:
+            cell_keys.append(keys[index])
+            cell_starts.append(position)
+    cell_starts.append(len(items))
+    return (min_x, min_y, width), cell_keys, cell_starts, array("I", items)
+
+
+def write_features(features, path, cell_size=DEFAULT_CELL_SIZE):
+    """
+    Zapisuje listę obiektów (słowników jak w plikach JSON warstw, z polami
+    "x" i "y") do pliku .feat. Plik jest podmieniany atomowo.
+    """
+    features = list(features)
+    for feature in features:
+        if "x" not in feature or "y" not in feature:
+            raise ValueError("Każdy obiekt musi mieć pola 'x' i 'y'")
+
+    names = []
+    for feature in features:
+        for key in feature:
+            if key not in names:
+                names.append(key)
+
+    strings, string_index = [], {}
+    arrays, columns = [], []
+    for name in names:
+        values = [feature.get(name) for feature in features]
+        kind = column_kind(name, values)
+        if kind == "s":
+            indices = array("I")
+            for value in values:
+                if value is None:
+                    indices.append(MISSING)
+                    continue
+                if value not in string_index:
+                    string_index[value] = len(strings)
+                    strings.append(value)
+                indices.append(string_index[value])
+            arrays.append(indices)
+        elif kind == "i":
+            arrays.append(array("i", values))
+        elif kind == "di":
+            arrays.append(array("d", [math.nan if value is None else value for value in values]))
+        else:
+            arrays.append(array("d", [math.nan if value is None else value for value in values]))
+        columns.append({"name": name, "kind": kind})
+
+    encoded = [value.encode("utf-8") for value in strings]
+    string_offsets = array("Q", [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    origin, cell_keys, cell_starts, items = build_index(
+        [feature["x"] for feature in features], [feature["y"] for feature in features], cell_size)
+
+    blocks = arrays + [string_offsets, b"".join(encoded), cell_keys, cell_starts, items]
+    header = {
+        "version": VERSION,
+        "count": len(features),
+        "columns": columns,
+        "string_count": len(strings),
+        "cell_size": cell_size,
+        "grid_origin": list(origin),
+        "cell_count": len(cell_keys),
+    }
+
+    # Przesunięcia bloków zależą od długości nagłówka, a nagłówek zawiera przesunięcia -
+    # liczymy je dla nagłówka z zapasem na cyfry i dopełniamy go spacjami
+    def layout(header_size):
+        offsets, position = [], header_size
+        for block in blocks:
+            position = (position + 7) // 8 * 8
+            offsets.append(position)
+            position += len(block) * (block.itemsize if isinstance(block, array) else 1)
+        return offsets
+
+    header["offsets"] = layout(0)
+    prefix = len(MAGIC) + 4
+    header_size = prefix + len(json.dumps(header).encode("utf-8")) + 64
+    header["offsets"] = layout(header_size)
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_size - prefix)
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for block, offset in zip(blocks, header["offsets"]):
+            f.write(b"\0" * (offset - f.tell()))
+            if isinstance(block, array):
+                if sys.byteorder == "big":
+                    block = array(block.typecode, block)
+                    block.byteswap()
+                block.tofile(f)
+            else:
+                f.write(block)
+    try:
+        os.replace(temp_path, path)
+    except OSError as e:
+        os.remove(temp_path)
+        raise OSError(f"Nie można podmienić pliku '{path}' (może być otwarty w innym programie): {e}") from e
+
+
+class FeatureFile:
+    """
+    Obiekty z pliku .feat, odczytywane przez mmap. Zachowuje się jak lista
+    słowników (len, indeksowanie, iteracja), a `query` korzysta z indeksu
+    zapisanego w pliku. Słowniki są tworzone przy odczycie - nie modyfikować.
+    """
+    closed = False
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        # Uszkodzony plik nie może zostawić otwartego mapowania (na Windows
+        # blokowałoby podmianę pliku przez write_features)
+        try:
+            self._read_header(path)
+        except BaseException:
+            self.close()
+            raise
+
+    def _view(self, offset, size, typecode):
+        if offset + size > len(self._mmap):
+            raise ValueError(f"Plik {FEATURE_EXTENSION} jest ucięty lub uszkodzony")
+        view = self._views[0][offset:offset + size].cast(typecode)
+        self._views.append(view)
+        return view
+
+    def _read_header(self, path):
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"'{path}' nie jest plikiem obiektów {FEATURE_EXTENSION}")
+        if sys.byteorder == "big":
+            raise ValueError("Pliki .feat są zapisane jako little-endian")
+
+        (header_size,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start:start + header_size])
+        if header["version"] != VERSION:
+            raise ValueError(f"Nieobsługiwana wersja pliku {FEATURE_EXTENSION}: {header['version']}")
+
+        self.count = header["count"]
+        self.cell_size = header["cell_size"]
+        self._grid_origin = header["grid_origin"]
+        self._views.append(memoryview(self._mmap))
+        offsets = iter(header["offsets"])
+        item_sizes = {"i": 4, "d": 8, "di": 8, "s": 4}
+        self.columns = {}
+        for column in header["columns"]:
+            kind = column["kind"]
+            self.columns[column["name"]] = (kind, self._view(next(offsets), item_sizes[kind] * self.count,
+                                                             {"s": "I", "di": "d"}.get(kind, kind)))
+
+        string_count = header["string_count"]
+        self._string_offsets = self._view(next(offsets), 8 * (string_count + 1), "Q")
+        self._string_data = next(offsets)
+        self._strings = {}
+
+        cell_count = header["cell_count"]
+        self._cell_keys = self._view(next(offsets), 8 * cell_count, "q")
+        self._cell_starts = self._view(next(offsets), 4 * (cell_count + 1), "I")
+        self._items = self._view(next(offsets), 4 * self.count, "I")
+
+    def string(self, index):
+        """Napis numer `index` z tablicy napisów (dekodowany raz)."""
+        value = self._strings.get(index)
+        if value is None:
+            start = self._string_data + self._string_offsets[index]
+            end = self._string_data + self._string_offsets[index + 1]
+            value = self._strings[index] = self._mmap[start:end].decode("utf-8")
+        return value
+
+    def distinct(self, name):
+        """Różne wartości kolumny `name` (dla napisów - bez przeglądania obiektów po kolei, przez tablicę indeksów)."""
+        column = self.columns.get(name)
+        if column is None:
+            return []
+        kind, values = column
+        if kind == "s":
+            return [self.string(index) for index in set(values) if index != MISSING]
+        return [int(value) if kind == "di" else value for value in set(values) if value == value]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        feature = {}
+        for name, (kind, values) in self.columns.items():
+            value = values[index]
+            if kind == "s":
+                if value != MISSING:
+                    feature[name] = self.string(value)
+            elif value == value:
+                feature[name] = int(value) if kind == "di" else value
+        return feature
+
+    def __iter__(self):
+        return (self[index] for index in range(self.count))
+
+    def items(self):
+        return ((index, self[index]) for index in range(self.count))
+
+    def query(self, rect):
+        """Indeksy obiektów, których punkt zaczepienia leży w prostokącie `rect`, rosnąco."""
+        if not self.count:
+            return []
+        size = self.cell_size
+        min_x, min_y, width = self._grid_origin
+        left = max(math.floor(rect[0] / size) - min_x, 0)
+        right = min(math.floor(rect[2] / size) - min_x, width - 1)
+        if right < left:
+            return []
+        top = max(math.floor(rect[1] / size) - min_y, 0)
+        bottom = math.floor(rect[3] / size) - min_y
+        xs, ys = self.columns["x"][1], self.columns["y"][1]
+
+        found = []
+        for row in range(top, bottom + 1):
+            first = bisect_left(self._cell_keys, row * width + left)
+            last = bisect_right(self._cell_keys, row * width + right)
+            if first == len(self._cell_keys):
+                break
+            for position in range(self._cell_starts[first], self._cell_starts[last]):
+                index = self._items[position]
+                if rect[0] <= xs[index] <= rect[2] and rect[1] <= ys[index] <= rect[3]:
+                    found.append(index)
+        found.sort()
+        return found
+
+    def close(self):
+        """
+        Zamyka mapowanie pliku. Jeśli dane są jeszcze używane (np. tablica NumPy
+        na kolumnie), mapowanie zostaje zamknięte dopiero razem z nimi.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            for view in self._views:
+                view.release()
+            self._mmap.close()
+        except BufferError:
+            pass
+
+
+def convert(json_path, output_path=None, cell_size=DEFAULT_CELL_SIZE):
+    """Konwertuje plik JSON warstwy do .feat (domyślnie obok, z rozszerzeniem .feat)."""
+    output_path = output_path or os.path.splitext(json_path)[0] + FEATURE_EXTENSION
+    with open(json_path, "r", encoding="utf-8") as f:
+        write_features(json.load(f), output_path, cell_size)
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Konwertuje plik JSON warstwy (dzielnice, fotoradary) do formatu .feat.")
+    parser.add_argument("input", help="Plik JSON z listą obiektów")
+    parser.add_argument("output", nargs="?", help="Plik wynikowy (domyślnie obok, z rozszerzeniem .feat)")
+    parser.add_argument("--cell-size", type=int, default=DEFAULT_CELL_SIZE, help="Bok komórki indeksu w pikselach mapy")
+    args = parser.parse_args(argv)
+    try:
+        output_path = convert(args.input, args.output, args.cell_size)
+    except OSError as e:
+        print(f"Błąd: {e}")
+        return 1
+    print(f"Zapisano: {output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Magazyn obiektów warstwy (dzielnic, fotoradarów) z indeksem przestrzennym
+w postaci równomiernej siatki. Pozwala szybko znaleźć obiekty przecinające
+prostokąt (kafelek, podgląd) i obiekt najbliższy klikniętemu punktowi.
+Dla plików .feat indeks jest już zapisany w pliku (FileFeatureStore).
+"""
+import math
+import threading
+from collections import OrderedDict
+import assets
+from .base import rects_intersect
+from .feature_file import FeatureFile
+
+DEFAULT_CELL_SIZE = 256
+
+
+class FeatureStore:
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.features = {}
+        self.bounds = {}
+        self._cells = {}
+        self._extent = None
+        self._next_index = 0
+
+    def __len__(self):
+        return len(self.features)
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (range(math.floor(rect[0] / size), math.floor(rect[2] / size) + 1),
+                range(math.floor(rect[1] / size), math.floor(rect[3] / size) + 1))
+
+    def add(self, feature, bounds, index=None):
+        """Dodaje obiekt z prostokątem `bounds` i zwraca jego indeks."""
+        if index is None:
+            index = self._next_index
+        self._next_index = max(self._next_index, index + 1)
+        self.features[index] = feature
+        self.bounds[index] = bounds
+        columns, rows = self._cell_range(bounds)
+        for cx in columns:
+            for cy in rows:
+                self._cells.setdefault((cx, cy), set()).add(index)
+        extent = (columns[0], rows[0], columns[-1], rows[-1])
+        if self._extent is not None:
+            extent = (min(extent[0], self._extent[0]), min(extent[1], self._extent[1]),
+                      max(extent[2], self._extent[2]), max(extent[3], self._extent[3]))
+        self._extent = extent
+        return index
+
+    def clear(self):
+        self.features.clear()
+        self.bounds.clear()
+        self._cells.clear()
+        self._extent = None
+        self._next_index = 0
+
+    def remove(self, index):
+        bounds = self.bounds.pop(index)
+        del self.features[index]
+        columns, rows = self._cell_range(bounds)
+        for cx in columns:
+            for cy in rows:
+                cell = self._cells[(cx, cy)]
+                cell.discard(index)
+                if not cell:
+                    del self._cells[(cx, cy)]
+
+    def query(self, rect):
+        """Zwraca [(indeks, obiekt)] przecinające `rect`, w kolejności dodania (czyli rysowania)."""
+        found = set()
+        columns, rows = self._cell_range(rect)
+        if len(columns) * len(rows) > len(self._cells):
+            # Prostokąt większy niż zajęta część siatki - taniej przejrzeć komórki
+            candidates = (index for cell in self._cells.values() for index in cell)
+        else:
+            candidates = (index for cx in columns for cy in rows
+                          for index in self._cells.get((cx, cy), ()))
+        for index in candidates:
+            if index not in found and rects_intersect(self.bounds[index], rect):
+                found.add(index)
+        return [(index, self.features[index]) for index in sorted(found)]
+
+    def first(self, rect, accept=None):
+        """
+        (indeks, obiekt) dowolnego obiektu przecinającego `rect`, dla którego
+        `accept(obiekt)` jest prawdziwe, albo None. Kończy na pierwszym trafieniu
+        i niczego nie sortuje - do sprawdzania kolizji.
+        """
+        x0, y0, x1, y1 = rect
+        bounds = self.bounds
+        columns, rows = self._cell_range(rect)
+        if len(columns) * len(rows) > len(self._cells):
+            candidates = (index for cell in self._cells.values() for index in cell)
+        else:
+            candidates = (index for cx in columns for cy in rows
+                          for index in self._cells.get((cx, cy), ()))
+        for index in candidates:
+            other = bounds[index]
+            if other[0] < x1 and x0 < other[2] and other[1] < y1 and y0 < other[3]:
+                if accept is None or accept(self.features[index]):
+                    return index, self.features[index]
+        return None
+
+    def nearest(self, x, y, max_distance=None):
+        """
+        Zwraca (indeks, obiekt) o punkcie zaczepienia najbliższym (x, y) albo
+        None. Przeszukuje coraz szersze pierścienie komórek siatki.
+        """
+        if not self.features:
+            return None
+        size = self.cell_size
+        cx, cy = math.floor(x / size), math.floor(y / size)
+        left, top, right, bottom = self._extent
+        max_ring = max(cx - left, right - cx, cy - top, bottom - cy, 0)
+        best, best_distance = None, math.inf
+
+        for ring in range(max_ring + 1):
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if max(abs(gx - cx), abs(gy - cy)) != ring:
+                        continue
+                    for index in self._cells.get((gx, gy), ()):
+                        feature = self.features[index]
+                        distance = math.hypot(feature["x"] - x, feature["y"] - y)
+                        if distance < best_distance or (distance == best_distance and index < best):
+                            best, best_distance = index, distance
+            # Obiekty w dalszych pierścieniach są co najmniej ring * size od punktu
+            if best is not None and best_distance <= ring * size:
+                break
+            if max_distance is not None and ring * size > max_distance:
+                break
+
+        if best is None or (max_distance is not None and best_distance > max_distance):
+            return None
+        return best, self.features[best]
+
+
+class FileFeatureStore:
+    """
+    Magazyn obiektów z pliku .feat - korzysta z indeksu zapisanego w pliku
+    zamiast budować siatkę prostokątów. Plik indeksuje punkty zaczepienia,
+    więc prostokąt zapytania jest poszerzany o `reach` (zasięg rysunku
+    obiektów od ich punktów, SectionRenderer.feature_reach). Wynik może
+    zawierać obiekty tylko blisko prostokąta - renderery i tak je przycinają.
+    """
+    def __init__(self, features, reach):
+        self.features = features
+        self.reach = reach
+
+    def __len__(self):
+        return len(self.features)
+
+    def query(self, rect):
+        """Zwraca [(indeks, obiekt)], które mogą przecinać `rect`, w kolejności z pliku."""
+        left, top, right, bottom = self.reach
+        rect = (rect[0] - right, rect[1] - bottom, rect[2] + left, rect[3] + top)
+        return [(index, self.features[index]) for index in self.features.query(rect)]
+
+
+_stores = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def load_feature_store(renderer, settings, max_stores=16):
+    """
+    Buduje (lub zwraca z bufora) magazyn obiektów z pliku `settings.data_path`
+    (JSON albo .feat) z prostokątami liczonymi przez `renderer.feature_bounds`. Bufor jest
+    unieważniany przy zmianie pliku danych lub pól `renderer.bounds_fields` - np. zmiana
+    koloru nie buduje magazynu od nowa.
+    """
+    key = (renderer.name, settings.data_path, assets.file_signature(settings.data_path),
+           tuple(getattr(settings, field) for field in renderer.bounds_fields))
+    with _stores_lock:
+        store = _stores.get(key)
+        # Plik .feat mógł zostać zamknięty (assets.release_features) - wtedy wczytujemy go ponownie
+        if store is not None and not (isinstance(store, FileFeatureStore) and store.features.closed):
+            _stores.move_to_end(key)
+            return store
+
+    features = assets.load_features(settings.data_path)
+    if isinstance(features, FeatureFile):
+        store = FileFeatureStore(features, renderer.feature_reach(settings, features))
+    else:
+        store = FeatureStore()
+        for feature in features:
+            store.add(feature, renderer.feature_bounds(settings, feature))
+
+    with _stores_lock:
+        _stores[key] = store
+        while len(_stores) > max_stores:
+            _stores.popitem(last=False)
+    return store
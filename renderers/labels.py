@@ -0,0 +1,127 @@
+"""
+Automatyczne rozmieszczanie podpisów wszystkich sekcji naraz. Każdy podpis
+dostaje przesunięcie i skalę (Placement) albo zostaje ukryty, tak aby podpisy
+nie nachodziły na siebie ani na stałe elementy mapy (np. ikonki fotoradarów).
+Kolizje są wyszukiwane w indeksie siatkowym (FeatureStore), więc koszt rośnie
+liniowo z liczbą podpisów. Sprawdzenie kandydata kończy się na pierwszej
+kolizji (FeatureStore.first) i zaczyna od przeszkód znalezionych dla
+poprzednich kandydatów tego podpisu, a przesunięcia wychodzące poza mapę są
+pomijane bez sprawdzania - na gęstych mapach większość podpisów próbuje
+wszystkich kandydatów, zanim zostanie ukryta.
+"""
+import math
+from dataclasses import dataclass
+from .features import FeatureStore
+
+# Przesunięcia próbowane po kolei, jako ułamek szerokości i wysokości podpisu
+CANDIDATE_OFFSETS = (
+    (0, 0),
+    (0, -0.5), (0, 0.5), (0.5, 0), (-0.5, 0),
+    (0.5, -0.5), (-0.5, -0.5), (0.5, 0.5), (-0.5, 0.5),
+    (0, -1), (0, 1), (1, 0), (-1, 0),
+)
+
+# Kolejne zmniejszenia podpisu, gdy żadne przesunięcie nie pasuje
+SHRINK_STEPS = (1.0, 0.85, 0.7)
+
+LABEL_CELL_SIZE = 128
+
+
+@dataclass(frozen=True)
+class Label:
+    """
+    Prostokąt podpisu (x0, y0, x1, y1) we współrzędnych mapy. `key` to
+    (nazwa sekcji, indeks obiektu). Podpisy `fixed` są przeszkodami, które
+    nie mogą się przesunąć ani zniknąć; nie kolidują z podpisem o tym samym
+    kluczu (np. ikonka z własną prędkością).
+    """
+    key: tuple
+    bounds: tuple
+    priority: float = 0
+    fixed: bool = False
+
+
+@dataclass(frozen=True)
+class Placement:
+    """Przesunięcie (we współrzędnych mapy) i skala podpisu względem jego środka."""
+    dx: float = 0
+    dy: float = 0
+    scale: float = 1.0
+
+    def apply(self, bounds):
+        center_x = (bounds[0] + bounds[2]) / 2 + self.dx
+        center_y = (bounds[1] + bounds[3]) / 2 + self.dy
+        half_width = (bounds[2] - bounds[0]) * self.scale / 2
+        half_height = (bounds[3] - bounds[1]) * self.scale / 2
+        return (center_x - half_width, center_y - half_height,
+                center_x + half_width, center_y + half_height)
+
+
+NO_PLACEMENT = Placement()
+
+
+def find_blocker(placed, label, bounds):
+    """Prostokąt dowolnego podpisu, z którym koliduje `bounds`, albo None."""
+    hit = placed.first(bounds, lambda other: other.key != label.key)
+    return placed.bounds[hit[0]] if hit is not None else None
+
+
+def place_labels(labels, cell_size=LABEL_CELL_SIZE, map_rect=None):
+    """
+    Rozmieszcza podpisy w kolejności od najwyższego priorytetu (przy równym -
+    w kolejności listy). Zwraca {klucz: Placement albo None (ukryty)} dla
+    podpisów, które nie są przeszkodami. Z `map_rect` podpis nie jest
+    przesuwany tak, żeby wystawał poza mapę (w miejscu zostaje zawsze).
+    """
+    placed = FeatureStore(cell_size)
+    for label in labels:
+        if label.fixed:
+            placed.add(label, label.bounds)
+
+    map_left, map_top, map_right, map_bottom = map_rect or (-math.inf, -math.inf, math.inf, math.inf)
+    placements = {}
+    for label in sorted((label for label in labels if not label.fixed), key=lambda label: -label.priority):
+        # Prostokąty kandydatów jak w Placement.apply, bez tworzenia Placement dla każdego
+        width = label.bounds[2] - label.bounds[0]
+        height = label.bounds[3] - label.bounds[1]
+        center_x = (label.bounds[0] + label.bounds[2]) / 2
+        center_y = (label.bounds[1] + label.bounds[3]) / 2
+        placements[label.key] = None
+        blockers = []
+        for scale in SHRINK_STEPS:
+            half_width = width * scale / 2
+            half_height = height * scale / 2
+            for offset_x, offset_y in CANDIDATE_OFFSETS:
+                dx, dy = offset_x * width * scale, offset_y * height * scale
+                x0, y0 = center_x + dx - half_width, center_y + dy - half_height
+                x1, y1 = center_x + dx + half_width, center_y + dy + half_height
+                if (offset_x or offset_y) and not (map_left <= x0 and map_top <= y0
+                                                   and x1 <= map_right and y1 <= map_bottom):
+                    continue
+                # Sąsiednie kandydaty blokuje zwykle ten sam podpis - najpierw znane przeszkody
+                for bx0, by0, bx1, by1 in blockers:
+                    if bx0 < x1 and x0 < bx1 and by0 < y1 and y0 < by1:
+                        break
+                else:
+                    bounds = (x0, y0, x1, y1)
+                    blocker = find_blocker(placed, label, bounds)
+                    if blocker is None:
+                        placed.add(label, bounds)
+                        placements[label.key] = Placement(dx, dy, scale)
+                        break
+                    blockers.append(blocker)
+            if placements[label.key] is not None:
+                break
+    return placements
+
+
+def placement_margin(placements):
+    """O ile podpisy mogą wystawać poza prostokąty obiektów po przesunięciu."""
+    if not placements:
+        return 0
+    return max((max(abs(placement.dx), abs(placement.dy))
+                for placement in placements.values() if placement is not None), default=0)
+
+
+def expand_rect(rect, margin):
+    return (rect[0] - margin, rect[1] - margin, rect[2] + margin, rect[3] + margin)
@@ -0,0 +1,66 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import fields
+from PIL import Image, ImageDraw
+import assets
+from .base import Viewport
+
+
+def input_files(settings):
+    """Pliki, od których zależy warstwa: wszystkie pola ustawień kończące się na `_path`."""
+    return [getattr(settings, f.name) for f in fields(settings) if f.name.endswith("_path")]
+
+
+def layer_key(settings, size, viewport, placements=None):
+    """
+    Skrót identyfikujący zawartość warstwy: ustawienia sekcji, sygnatury
+    plików wejściowych (dane, czcionka, ikonka), rozmiar i skala obrazu oraz
+    rozmieszczenie podpisów.
+    """
+    payload = {
+        "settings": settings.to_dict(),
+        "inputs": [[path, assets.file_signature(path)] for path in input_files(settings)],
+        "size": list(size),
+        "viewport": [viewport.scale, viewport.left, viewport.top],
+    }
+    if placements is not None:
+        payload["placements"] = [
+            [index, None if placement is None else [placement.dx, placement.dy, placement.scale]]
+            for index, placement in sorted(placements.items())
+        ]
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LayerCache:
+    """
+    Bufor wyrenderowanych warstw sekcji (przezroczyste obrazy RGBA) z
+    usuwaniem najdawniej używanych. Warstwy są współdzielone - nie modyfikować.
+    """
+    def __init__(self, max_layers=8):
+        self.max_layers = max_layers
+        self._layers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_layer(self, renderer, settings, size, viewport=None, placements=None):
+        viewport = viewport or Viewport()
+        key = layer_key(settings, size, viewport, placements)
+        with self._lock:
+            layer = self._layers.get(key)
+            if layer is not None:
+                self._layers.move_to_end(key)
+                return layer
+
+        layer = Image.new("RGBA", size, (0, 0, 0, 0))
+        renderer.render(layer, ImageDraw.Draw(layer), settings, viewport, placements)
+
+        with self._lock:
+            self._layers[key] = layer
+            while len(self._layers) > self.max_layers:
+                self._layers.popitem(last=False)
+        return layer
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
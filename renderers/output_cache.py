@@ -0,0 +1,168 @@
+"""
+Bufor gotowych map na dysku, adresowany zawartością. Kluczem pliku jest skrót
+bajtów mapy bazowej, plików używanych przez włączone sekcje (dane warstw,
+czcionki, ikonki), ustawień sekcji, wersji rendererów i profilu zapisu - to
+samo zlecenie zwraca od razu istniejący plik zamiast renderować mapę ponownie.
+
+Nazwa pliku zapisanego bez kanału alfa ma dopisek ".rgb", żeby trafienie
+zwracało tę samą informację (ExportResult.dropped_alpha) co pierwszy zapis.
+
+Rozmiar katalogu jest ograniczony: po każdym zapisie usuwane są najdawniej
+używane pliki (czas modyfikacji jest odświeżany przy każdym trafieniu).
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import assets
+from .export import DEFAULT_PROFILE, ExportResult, export_image, get_profile
+from .pipeline import render_map
+from .profiling import stage
+
+# Wersja wyglądu map w kluczu bufora. TRZEBA ją zwiększyć przy każdej zmianie
+# rendererów (renderers/*, czcionki w text.py, rozmieszczanie podpisów), po
+# której te same ustawienia dają inny obraz - inaczej bufor będzie zwracał
+# mapy narysowane starym kodem. Zwiększenie unieważnia wszystkie starsze wpisy.
+RENDERER_VERSION = 2
+
+CACHE_DIR = os.path.join("output", "cache")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path):
+    """Skrót SHA-256 zawartości pliku (zapamiętany do jego zmiany) albo None, gdy pliku nie ma."""
+    def loader():
+        try:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        except OSError:
+            return None
+    return assets.cache.get(("sha256", path), path, loader)
+
+
+def job_digest(job, profile_name=DEFAULT_PROFILE):
+    """
+    Klucz wyniku `job` zapisanego profilem `profile_name`. Wyłączone sekcje
+    są pomijane, a z ustawień sekcji brane są też skróty plików ze wszystkich
+    pól `*_path`, więc zmiana zawartości pliku pod tą samą ścieżką zmienia klucz.
+    """
+    sections = []
+    for settings in job.sections:
+        if not settings.enabled:
+            continue
+        data = settings.to_dict()
+        files = {key: file_digest(value) for key, value in data.items() if key.endswith("_path")}
+        sections.append({"settings": data, "files": files})
+
+    key = {
+        "version": RENDERER_VERSION,
+        "profile": profile_name,
+        "map": file_digest(job.map_path),
+        "place_labels": job.place_labels,
+        "sections": sections,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class OutputCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, digest, profile_name, dropped_alpha=False):
+        suffix = ".rgb" if dropped_alpha else ""
+        return os.path.join(self.directory, digest + suffix + get_profile(profile_name).extension)
+
+    def lookup(self, digest, profile_name):
+        """(ścieżka zapisanej mapy, czy zapisano ją bez kanału alfa) albo None; odświeża czas użycia."""
+        for dropped_alpha in (False, True):
+            path = self.path_for(digest, profile_name, dropped_alpha)
+            try:
+                os.utime(path)
+            except OSError:
+                continue
+            return path, dropped_alpha
+        return None
+
+    def store(self, image, digest, profile_name):
+        """Zapisuje `image` pod kluczem `digest` i usuwa najdawniej używane pliki ponad limit."""
+        # Ukryty plik tymczasowy podmieniany atomowo - równoległy odczyt nie zobaczy niepełnego pliku
+        temp_path = os.path.join(self.directory, f".{digest}.{os.getpid()}.{threading.get_ident()}"
+                                 f"{get_profile(profile_name).extension}")
+        result = export_image(image, temp_path, profile_name)
+        path = self.path_for(digest, profile_name, result.dropped_alpha)
+        os.replace(temp_path, path)
+        result.path = path
+        self.evict(keep=path)
+        return result
+
+    def entries(self):
+        """[(czas użycia, rozmiar, ścieżka)] plików w buforze, od najdawniej używanego."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.startswith("."):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=None):
+        """Usuwa najdawniej używane pliki, aż bufor zmieści się w `max_bytes`; zwraca liczbę usuniętych."""
+        removed = 0
+        with self._lock:
+            entries = self.entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        return removed
+
+
+def export_cached(job, cache, profile_name=DEFAULT_PROFILE, progress=None, is_cancelled=None, layer_cache=None):
+    """
+    Zwraca ExportResult z mapą `job` z bufora `cache` albo - gdy jej tam nie
+    ma - renderuje ją, zapisuje do bufora i zwraca wynik zapisu.
+    """
+    start = time.perf_counter()
+    with stage("cache"):
+        digest = job_digest(job, profile_name)
+        entry = cache.lookup(digest, profile_name)
+    if entry is not None:
+        path, dropped_alpha = entry
+        return ExportResult(
+            path=path,
+            profile=profile_name,
+            seconds=time.perf_counter() - start,
+            bytes=os.path.getsize(path),
+            dropped_alpha=dropped_alpha,
+            cached=True,
+        )
+    image = render_map(job, progress, is_cancelled, layer_cache=layer_cache)
+    return cache.store(image, digest, profile_name)
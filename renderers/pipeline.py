@@ -0,0 +1,151 @@
+import json
+import threading
+from dataclasses import dataclass, field
+from PIL import ImageDraw
+import assets
+from sections.registry import registered_sections
+from .base import Viewport, check_path
+from .labels import place_labels
+from .profiling import stage
+
+# Renderery sekcji z rejestru (sections.registry), tworzone przy pierwszym użyciu
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+class RenderCancelled(Exception):
+    """Renderowanie zostało przerwane przez użytkownika."""
+
+
+def get_renderer(name):
+    """Renderer sekcji `name` wskazany w jej SECTION_INFO (jeden obiekt na proces)."""
+    renderer = _renderers.get(name)
+    if renderer is not None:
+        return renderer
+    with _renderers_lock:
+        if name not in _renderers:
+            info = next((info for info in registered_sections() if info.name == name), None)
+            renderer = info.load_renderer() if info is not None else None
+            if renderer is None:
+                raise ValueError(f"Nieznana sekcja: '{name}'")
+            _renderers[name] = renderer
+        return _renderers[name]
+
+
+def default_sections():
+    """Domyślne ustawienia wszystkich sekcji z rejestru, w kolejności rysowania."""
+    return [get_renderer(info.name).settings_class()
+            for info in registered_sections() if info.renderer]
+
+
+@dataclass
+class RenderJob:
+    """
+    Kompletny opis jednej mapy do wyrenderowania: mapa bazowa, ustawienia
+    sekcji w kolejności rysowania i to, czy podpisy sekcji mają być
+    automatycznie rozmieszczane (bez nachodzenia na siebie).
+    """
+    map_path: str = "resources/map.png"
+    sections: list = field(default_factory=default_sections)
+    place_labels: bool = False
+
+    @classmethod
+    def from_dict(cls, data):
+        sections = []
+        for section_data in data.get("sections", []):
+            renderer = get_renderer(section_data["name"])
+            sections.append(renderer.settings_class.from_dict(section_data))
+        return cls(map_path=check_path("map", data.get("map", cls.map_path)), sections=sections,
+                   place_labels=data.get("place_labels", cls.place_labels))
+
+    def to_dict(self):
+        return {
+            "map": self.map_path,
+            "sections": [settings.to_dict() for settings in self.sections],
+            "place_labels": self.place_labels,
+        }
+
+
+def load_job(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return RenderJob.from_dict(json.load(f))
+
+
+def save_job(job, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(job.to_dict(), f, indent=4, ensure_ascii=False)
+
+
+def solve_labels(sections, map_size=None):
+    """
+    Rozmieszcza podpisy wszystkich włączonych sekcji naraz (labels.place_labels)
+    i zwraca {nazwa sekcji: {indeks obiektu: Placement albo None}} dla compose.
+    Z `map_size` podpisy nie są przesuwane poza mapę.
+    """
+    enabled = [settings for settings in sections if settings.enabled]
+    labels = []
+    for settings in enabled:
+        labels.extend(get_renderer(settings.name).labels(settings))
+
+    placements = {settings.name: {} for settings in enabled}
+    map_rect = (0, 0) + tuple(map_size) if map_size else None
+    for (name, index), placement in place_labels(labels, map_rect=map_rect).items():
+        placements[name][index] = placement
+    return placements
+
+
+def job_placements(job):
+    """Rozmieszczenie podpisów dla `job` albo None, gdy automatyczne rozmieszczanie jest wyłączone."""
+    return solve_labels(job.sections, assets.image_size(job.map_path)) if job.place_labels else None
+
+
+def render_map(job, progress=None, is_cancelled=None, layer_cache=None):
+    """
+    Renderuje mapę opisaną przez `job` i zwraca obraz RGBA.
+
+    `progress(krok, liczba_kroków, nazwa_sekcji)` jest wywoływane przed każdą
+    sekcją, a `is_cancelled()` sprawdzane między sekcjami - gdy zwróci True,
+    rzucany jest RenderCancelled. Z `layer_cache` (LayerCache) każda sekcja
+    jest rysowana na własnej warstwie i ponownie renderowana tylko wtedy, gdy
+    zmieniły się jej ustawienia lub pliki wejściowe.
+    """
+    with stage("decode"):
+        base = assets.load_map(job.map_path)
+    with stage("labels"):
+        placements = job_placements(job)
+    return compose(base, job.sections, progress=progress, is_cancelled=is_cancelled,
+                   layer_cache=layer_cache, placements=placements)
+
+
+def compose(base, sections, viewport=None, progress=None, is_cancelled=None, layer_cache=None,
+            placements=None):
+    """
+    Rysuje włączone sekcje na kopii obrazu `base` (w skali `viewport`).
+    `placements` pochodzi z solve_labels i jest liczone dla całej mapy, więc
+    przy renderowaniu kafelkami wszystkie kafelki dostają to samo rozmieszczenie.
+    """
+    enabled = [settings for settings in sections if settings.enabled]
+
+    with stage("composite"):
+        image = base.copy()
+    draw = ImageDraw.Draw(image)
+
+    for step, settings in enumerate(enabled):
+        if is_cancelled and is_cancelled():
+            raise RenderCancelled()
+        if progress:
+            progress(step, len(enabled), settings.name)
+        renderer = get_renderer(settings.name)
+        section_placements = placements.get(settings.name) if placements is not None else None
+        if layer_cache is not None:
+            with stage(f"section:{settings.name}"):
+                layer = layer_cache.get_layer(renderer, settings, image.size, viewport, section_placements)
+            with stage("composite"):
+                image.alpha_composite(layer)
+        else:
+            with stage(f"section:{settings.name}"):
+                renderer.render(image, draw, settings, viewport or Viewport(), section_placements)
+
+    if is_cancelled and is_cancelled():
+        raise RenderCancelled()
+    return image
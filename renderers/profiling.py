@@ -0,0 +1,176 @@
+"""
+Pomiary renderowania: czasy etapów (dekodowanie mapy, rozmieszczanie
+podpisów, każda sekcja, składanie warstw, zapis), pamięć, liczniki alokacji
+i błędy sekcji, zbierane do raportu JSON.
+
+Etapy są mierzone tylko wtedy, gdy w bieżącym wątku aktywny jest raport
+(RenderReport.activate) - bez raportu `stage` nic nie kosztuje. Tryb `trace`
+dodatkowo włącza cProfile i tracemalloc (wolniejszy, do szukania przyczyn).
+"""
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:
+    # Windows nie ma modułu resource - szczytowe zużycie pamięci procesu nie jest wtedy mierzone
+    resource = None
+
+# Ile najkosztowniejszych funkcji z cProfile umieszczać w raporcie
+PROFILE_TOP = 25
+
+_active = threading.local()
+
+
+def peak_rss():
+    """Szczytowe zużycie pamięci procesu w bajtach albo None, gdy system go nie udostępnia."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje kilobajty, macOS bajty
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_report():
+    return getattr(_active, "report", None)
+
+
+def stage(name):
+    """Mierzy etap `name` w raporcie aktywnym w bieżącym wątku (albo nic nie robi)."""
+    report = current_report()
+    return report.stage(name) if report is not None else nullcontext()
+
+
+def record_error(section, message):
+    """
+    Wypisuje błąd sekcji (jak dotychczas) i dopisuje go do aktywnego raportu,
+    żeby błędy połknięte przez renderer było widać w wynikach pomiarów.
+    """
+    print(message)
+    report = current_report()
+    if report is not None:
+        report.errors.append({"section": section, "message": message})
+
+
+class RenderReport:
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.stages = {}
+        self.errors = []
+        self.info = {}
+        self.seconds = 0
+        self.peak_rss = None
+        self.profiler = None
+        # Szczyty tracemalloc otwartych etapów - etap zagnieżdżony zeruje
+        # szczyt, więc wcześniejszy szczyt etapu nadrzędnego jest tu zapamiętany
+        self._traced_peaks = []
+
+    @contextmanager
+    def activate(self):
+        """Zbiera pomiary wszystkich etapów wykonanych w bieżącym wątku w bloku `with`."""
+        previous = current_report()
+        _active.report = self
+        started_tracing = False
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.seconds += time.perf_counter() - start
+            if self.profiler is not None:
+                self.profiler.disable()
+            if started_tracing:
+                tracemalloc.stop()
+            self.peak_rss = peak_rss()
+            _active.report = previous
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Dolicza do etapu `name` czas, liczbę wywołań, przyrost żywych bloków
+        pamięci Pythona i przyrost szczytowego zużycia pamięci procesu; w trybie
+        `trace` także szczyt i przyrost pamięci według tracemalloc. Etap
+        wywołany wiele razy (np. dla każdego kafelka) jest sumowany. Szczyt
+        etapu obejmuje szczyty etapów w nim zagnieżdżonych.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            traced_before, peak = tracemalloc.get_traced_memory()
+            if self._traced_peaks:
+                self._traced_peaks[-1] = max(self._traced_peaks[-1], peak)
+            tracemalloc.reset_peak()
+            self._traced_peaks.append(0)
+        blocks_before = sys.getallocatedblocks()
+        rss_before = peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {"seconds": 0, "calls": 0, "allocated_blocks": 0})
+            entry["seconds"] += time.perf_counter() - start
+            entry["calls"] += 1
+            entry["allocated_blocks"] += sys.getallocatedblocks() - blocks_before
+            if rss_before is not None:
+                entry["peak_rss_growth"] = entry.get("peak_rss_growth", 0) + peak_rss() - rss_before
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self._traced_peaks.pop())
+                if self._traced_peaks:
+                    self._traced_peaks[-1] = max(self._traced_peaks[-1], peak)
+                entry["traced_peak"] = max(entry.get("traced_peak", 0), peak - traced_before)
+                entry["traced_growth"] = entry.get("traced_growth", 0) + current - traced_before
+
+    def profile_top(self, limit=PROFILE_TOP):
+        """Najkosztowniejsze funkcje (czas łączny z wywołaniami) z cProfile."""
+        if self.profiler is None:
+            return []
+        stats = pstats.Stats(self.profiler)
+        rows = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "total_seconds": total,
+                "cumulative_seconds": cumulative,
+            })
+        rows.sort(key=lambda row: row["cumulative_seconds"], reverse=True)
+        return rows[:limit]
+
+    def to_dict(self):
+        return {
+            "seconds": self.seconds,
+            "peak_rss": self.peak_rss,
+            "stages": [{"name": name, **entry} for name, entry in self.stages.items()],
+            "errors": self.errors,
+            "info": self.info,
+            "profile": self.profile_top(),
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4, ensure_ascii=False)
+
+    def save_profile(self, path):
+        """Zapisuje pełne statystyki cProfile (do otwarcia np. w snakeviz)."""
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
+
+    def summary(self):
+        stages = ", ".join(f"{name} {entry['seconds']:.2f} s" for name, entry in self.stages.items())
+        text = f"razem {self.seconds:.2f} s ({stages})"
+        if self.peak_rss is not None:
+            text += f", szczyt pamięci {self.peak_rss / 1024 / 1024:.0f} MB"
+        if self.errors:
+            text += f", błędy: {len(self.errors)}"
+        return text
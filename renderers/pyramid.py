@@ -0,0 +1,56 @@
+"""
+Piramida rozdzielczości mapy: poziom 0 to pełna rozdzielczość, każdy
+kolejny jest dwa razy mniejszy (liczony z poprzedniego). Obraz na każdym
+poziomie jest dzielony na kwadratowe kafelki.
+"""
+import math
+
+TILE_SIZE = 256
+
+
+class TilePyramid:
+    def __init__(self, image, tile_size=TILE_SIZE):
+        self.tile_size = tile_size
+        self.size = image.size
+        self.levels = [image]
+        while max(self.levels[-1].size) > tile_size:
+            # Każdy poziom powstaje z poprzedniego (uśrednianie bloków 2x2,
+            # ostatni niepełny blok daje piksel brzegowy)
+            self.levels.append(self.levels[-1].reduce(2))
+
+    @property
+    def level_count(self):
+        return len(self.levels)
+
+    def scale(self, level):
+        """Ile pikseli oryginału przypada na jeden piksel poziomu `level`."""
+        return 2 ** level
+
+    def level_for_zoom(self, zoom):
+        """Najmniejszy poziom, który przy powiększeniu `zoom` (piksele ekranu na piksel mapy) nie traci szczegółów."""
+        if zoom >= 1:
+            return 0
+        return max(0, min(self.level_count - 1, int(math.floor(math.log2(1 / zoom)))))
+
+    def tile_range(self, level, rect):
+        """Zakres kafelków (kolumny, wiersze) poziomu `level` przecinających prostokąt `rect` w pikselach oryginału."""
+        image = self.levels[level]
+        scale = self.scale(level)
+        size = self.tile_size
+        columns = math.ceil(image.width / size)
+        rows = math.ceil(image.height / size)
+        left = max(0, int(rect[0] / scale) // size)
+        top = max(0, int(rect[1] / scale) // size)
+        right = min(columns - 1, int(math.ceil(rect[2] / scale)) // size)
+        bottom = min(rows - 1, int(math.ceil(rect[3] / scale)) // size)
+        return range(left, right + 1), range(top, bottom + 1)
+
+    def tile_box(self, level, column, row):
+        """Prostokąt kafelka w pikselach poziomu `level`."""
+        image = self.levels[level]
+        size = self.tile_size
+        return (column * size, row * size,
+                min((column + 1) * size, image.width), min((row + 1) * size, image.height))
+
+    def tile(self, level, column, row):
+        return self.levels[level].crop(self.tile_box(level, column, row))
@@ -0,0 +1,197 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from PIL import Image, ImageDraw
+import assets
+from .base import SectionRenderer, SectionSettings, Viewport, alpha_composite_at, bounds_reach, pixel
+from .features import load_feature_store
+from .labels import NO_PLACEMENT, Label, expand_rect, placement_margin
+from .profiling import record_error
+from .text import draw_text
+
+
+@dataclass
+class SpeedCamerasSettings(SectionSettings):
+    name = "speed_cameras"
+
+    enabled: bool = True
+    data_path: str = "resources/speed_cameras.json"
+    icon_path: str = "resources/radar.png"
+    circle_radius: int = 60
+    circle_color: tuple = (255, 0, 0, 50)
+    icon_color: tuple = (254, 127, 0, 255)
+    show_speed: bool = True
+    font_path: str = "resources/Fredoka-Bold.ttf"
+    font_size: int = 14
+    text_color: tuple = (254, 127, 0)
+    text_outline_color: tuple = (0, 0, 0)
+    text_outline_width: int = 1
+    label_priority: int = 1
+
+
+@lru_cache(maxsize=32)
+def tinted_icon(icon_path, icon_size, tint_color, signature=None):
+    """
+    Zwraca ikonkę przeskalowaną do `icon_size` i pokolorowaną na `tint_color`
+    (zachowuje kanał alfa oryginału). Wynik jest współdzielony - nie modyfikować.
+    `signature` (z `assets.file_signature`) unieważnia wpis po zmianie pliku.
+    """
+    icon = assets.load_image(icon_path).resize((icon_size, icon_size), Image.Resampling.LANCZOS)
+
+    colored_icon = Image.new("RGBA", icon.size, tuple(tint_color[:3]) + (255,))
+    colored_icon.putalpha(icon.getchannel("A"))
+    return colored_icon
+
+
+@lru_cache(maxsize=1024)
+def speed_bbox(speed, font):
+    """font.getbbox(speed) - prędkości się powtarzają, a pomiar tekstu jest kosztowny."""
+    return font.getbbox(speed)
+
+
+def icon_size_for(circle_radius):
+    icon_size = int(circle_radius * 0.5)
+    if icon_size < 10: icon_size = 10
+    return icon_size
+
+
+class SpeedCamerasRenderer(SectionRenderer):
+    name = "speed_cameras"
+    settings_class = SpeedCamerasSettings
+    bounds_fields = ("circle_radius", "show_speed", "font_path", "font_size", "text_outline_width")
+
+    def feature_bounds(self, settings, feature):
+        x, y = feature["x"], feature["y"]
+        icon_size = icon_size_for(settings.circle_radius)
+        # Kółko ma 2 * promień + 1 pikseli, a środek kółka i ikonki jest
+        # zaokrąglany do piksela - stąd zapas 1 piksela
+        reach = max(settings.circle_radius, icon_size / 2) + 1
+        bounds = [x - reach, y - reach, x + reach, y + reach]
+
+        speed = feature.get("speed", "")
+        if settings.show_speed and speed:
+            font = assets.load_font(settings.font_path, settings.font_size)
+            left, top, right, bottom = speed_bbox(speed, font)
+            text_y = y + icon_size / 2 - (bottom - top) + 10
+            margin = settings.text_outline_width + 1
+            bounds[0] = min(bounds[0], x - (right - left) / 2 - margin)
+            bounds[2] = max(bounds[2], x + (right - left) / 2 + margin)
+            bounds[1] = min(bounds[1], text_y + top - margin)
+            bounds[3] = max(bounds[3], text_y + bottom + margin)
+        return tuple(bounds)
+
+    def feature_reach(self, settings, features):
+        # Prostokąt zależy tylko od prędkości - wystarczy sprawdzić każdą prędkość raz
+        reach = bounds_reach((0, 0, 0, 0), self.feature_bounds(settings, {"x": 0, "y": 0}), 0, 0)
+        for speed in features.distinct("speed"):
+            reach = bounds_reach(reach, self.feature_bounds(settings, {"x": 0, "y": 0, "speed": speed}), 0, 0)
+        return reach
+
+    def speed_label_bounds(self, settings, feature, font):
+        """Prostokąt napisu z prędkością (z obwódką) w stałej pozycji, we współrzędnych mapy."""
+        left, top, right, bottom = speed_bbox(feature["speed"], font)
+        text_x = feature["x"] - (right - left) / 2
+        text_y = feature["y"] + icon_size_for(settings.circle_radius) / 2 - (bottom - top) + 10
+        margin = settings.text_outline_width
+        return (text_x + left - margin, text_y + top - margin,
+                text_x + right + margin, text_y + bottom + margin)
+
+    def labels(self, settings):
+        """Napisy z prędkością; ikonki są przeszkodami, których podpisy nie mogą zasłaniać."""
+        font = assets.load_font(settings.font_path, settings.font_size)
+        half_icon = icon_size_for(settings.circle_radius) / 2
+        labels = []
+        for index, feature in load_feature_store(self, settings).features.items():
+            key = (self.name, index)
+            x, y = feature["x"], feature["y"]
+            labels.append(Label(key, (x - half_icon, y - half_icon, x + half_icon, y + half_icon), fixed=True))
+            if settings.show_speed and feature.get("speed", ""):
+                labels.append(Label(key, self.speed_label_bounds(settings, feature, font),
+                                    settings.label_priority + feature.get("priority", 0)))
+        return labels
+
+    def render(self, image, draw, settings, viewport=None, placements=None):
+        viewport = viewport or Viewport()
+        try:
+            json_path = settings.data_path
+            if not os.path.exists(json_path):
+                record_error(self.name, f"[SpeedCamerasSection] Błąd: Plik '{json_path}' nie istnieje. Nie można wyrenderować fotoradarów.")
+                return
+
+            store = load_feature_store(self, settings)
+
+            circle_radius = viewport.length(settings.circle_radius, minimum=1)
+            circle_fill_color = tuple(settings.circle_color)
+
+            icon_size = icon_size_for(settings.circle_radius)
+
+            icon_path = settings.icon_path
+            radar_icon = None
+            if os.path.exists(icon_path):
+                radar_icon = tinted_icon(icon_path, viewport.length(icon_size, minimum=1), tuple(settings.icon_color),
+                                         assets.file_signature(icon_path))
+            else:
+                record_error(self.name, f"[SpeedCamerasSection] Ostrzeżenie: Plik ikonki '{icon_path}' nie istnieje. Fotoradary będą renderowane bez ikon.")
+
+            font = assets.load_font(settings.font_path, viewport.length(settings.font_size, minimum=1))
+
+            # Kółko jest takie samo dla każdego fotoradaru, więc rysujemy je raz
+            # i nakładamy tylko na jego obszar zamiast na całą mapę
+            circle_image = Image.new("RGBA", (2 * circle_radius + 1, 2 * circle_radius + 1), (0,0,0,0))
+            ImageDraw.Draw(circle_image).ellipse((0, 0, 2 * circle_radius, 2 * circle_radius), fill=circle_fill_color)
+
+            text_fill_color = tuple(settings.text_color[:3])
+            text_outline_color = tuple(settings.text_outline_color[:3])
+            text_outline_width = viewport.length(settings.text_outline_width, minimum=min(1, settings.text_outline_width))
+            show_speed = settings.show_speed
+
+            # Czcionka w skali mapy (do prostokątów podpisów) i czcionki zmniejszonych podpisów
+            map_font = assets.load_font(settings.font_path, settings.font_size)
+            label_fonts = {}
+            # Przesunięte podpisy mogą wystawać poza prostokąty obiektów w indeksie
+            rect = expand_rect(viewport.map_rect(image.size), placement_margin(placements))
+
+            for index, camera in store.query(rect):
+                placement = placements.get(index, NO_PLACEMENT) if placements is not None else NO_PLACEMENT
+                x, y = viewport.point(camera["x"], camera["y"])
+                speed = camera.get("speed", "")
+
+                alpha_composite_at(image, circle_image, pixel(x) - circle_radius, pixel(y) - circle_radius)
+
+                if radar_icon:
+                    icon_x = pixel(x) - radar_icon.width // 2
+                    icon_y = pixel(y) - radar_icon.height // 2
+
+                    alpha_composite_at(image, radar_icon, icon_x, icon_y)
+
+                # Podpis ukryty przez rozmieszczanie (placement None) nie jest rysowany
+                if show_speed and speed and placement is not None:
+                    if placement != NO_PLACEMENT:
+                        # Podpis przesunięty lub zmniejszony: środek napisu w środku jego nowego prostokąta
+                        label_font = label_fonts.get(placement.scale)
+                        if label_font is None:
+                            label_font = label_fonts[placement.scale] = assets.load_font(
+                                settings.font_path, viewport.length(settings.font_size * placement.scale, minimum=1))
+                        bounds = placement.apply(self.speed_label_bounds(settings, camera, map_font))
+                        center_x, center_y = viewport.point((bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2)
+                        bbox = speed_bbox(speed, label_font)
+                        draw_text(image, (center_x - (bbox[0] + bbox[2]) / 2, center_y - (bbox[1] + bbox[3]) / 2),
+                                  speed, label_font, text_outline_width, text_fill_color, text_outline_color)
+                        continue
+
+                    text_to_draw = speed
+
+                    bbox = speed_bbox(text_to_draw, font)
+                    text_width = bbox[2] - bbox[0]
+                    text_height = bbox[3] - bbox[1]
+
+                    _, text_y_start = viewport.point(camera["x"], camera["y"] + icon_size / 2)
+                    text_y = text_y_start - text_height + 10 * viewport.scale
+
+                    text_x = x - text_width / 2
+
+                    draw_text(image, (text_x, text_y), text_to_draw, font, text_outline_width,
+                              text_fill_color, text_outline_color)
+
+        except Exception as e:
+            record_error(self.name, f"[SpeedCamerasSection] Błąd renderowania: {e}")
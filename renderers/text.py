@@ -0,0 +1,108 @@
+from functools import lru_cache
+from PIL import Image, ImageDraw
+from .base import alpha_composite_at, pixel
+
+
+# Pozycje znaków w FreeType mają dokładność 1/64 piksela (format 26.6)
+SUBPIXELS = 64
+
+
+@lru_cache(maxsize=32768)
+def glyph_masks(char, font, outline_width, phase):
+    """
+    Atlas znaków: maski (wypełnienie, obwódka) jednego znaku przesuniętego o
+    `phase`/64 piksela i przesunięcie ich lewego górnego rogu względem
+    całkowitej pozycji pióra. Każdy znak danej czcionki, rozmiaru, grubości
+    obwódki i przesunięcia jest rasteryzowany tylko raz, niezależnie od tego,
+    w ilu napisach występuje. Dla znaków bez kształtu (spacja) zwraca None.
+    """
+    left, top, right, bottom = font.getbbox(char, stroke_width=outline_width)
+    if right <= left or bottom <= top:
+        return None
+    # Zapas z lewej, żeby pozycja rysowania nie była ujemna, i kolumna z prawej na przesunięcie
+    margin = max(0, -left) + 1
+    size = (margin + right + 1, bottom - top)
+    xy = (margin + phase / SUBPIXELS, -top)
+
+    fill_mask = Image.new("L", size, 0)
+    ImageDraw.Draw(fill_mask).text(xy, char, font=font, fill=255)
+
+    outline_mask = None
+    if outline_width > 0:
+        outline_mask = Image.new("L", size, 0)
+        ImageDraw.Draw(outline_mask).text(xy, char, font=font, fill=255,
+                                          stroke_width=outline_width, stroke_fill=255)
+    return fill_mask, outline_mask, (-margin, top)
+
+
+def blit_mask(target, mask, xy):
+    """
+    Nakłada maskę na `target` w punkcie `xy`. Nachodzące na siebie brzegi
+    znaków łączy tak samo jak FreeType w Pillow (pokrycie + reszta * maska,
+    z zaokrągleniem), więc wynik jest identyczny z napisem narysowanym w całości.
+    """
+    target.paste(255, (xy[0], xy[1], xy[0] + mask.width, xy[1] + mask.height), mask)
+
+
+def pen_position(text, font, i):
+    """
+    Pozycja pióra przed znakiem `i` w 1/64 piksela: długość napisu do tego
+    znaku włącznie minus jego własna szerokość, więc obejmuje też kerning
+    z poprzednim znakiem.
+    """
+    return round((font.getlength(text[:i + 1]) - font.getlength(text[i])) * SUBPIXELS)
+
+
+def text_masks(text, font, outline_width, size, origin):
+    """
+    Składa maski całego napisu ze znaków z atlasu, każdy w jego dokładnej
+    (podpikselowej) pozycji - tak jak układa je Pillow przy rysowaniu całego napisu.
+    """
+    fill_mask = Image.new("L", size, 0)
+    outline_mask = Image.new("L", size, 0) if outline_width > 0 else None
+    for i, char in enumerate(text):
+        pen = pen_position(text, font, i)
+        glyph = glyph_masks(char, font, outline_width, pen % SUBPIXELS)
+        if glyph is None:
+            continue
+        glyph_fill, glyph_outline, (left, top) = glyph
+        xy = (pen // SUBPIXELS + left - origin[0], top - origin[1])
+        blit_mask(fill_mask, glyph_fill, xy)
+        if outline_mask is not None:
+            blit_mask(outline_mask, glyph_outline, xy)
+    return fill_mask, outline_mask
+
+
+@lru_cache(maxsize=4096)
+def text_stamp(text, font, outline_width, fill, outline_fill):
+    """
+    Składa tekst z obwódką jeden raz i zwraca (stempel RGBA, przesunięcie
+    lewego górnego rogu względem punktu zaczepienia tekstu). Maski znaków
+    pochodzą z atlasu (`glyph_masks`), a obwódka powstaje przez stroke
+    czcionki, więc koszt nie rośnie z kwadratem jej grubości.
+
+    `font` pochodzi z `assets.load_font`, więc po zmianie pliku czcionki
+    jest nowym obiektem i stare stemple przestają pasować do klucza.
+    """
+    left, top, right, bottom = font.getbbox(text, stroke_width=outline_width)
+    size = (max(1, right - left), max(1, bottom - top))
+
+    fill_mask, outline_mask = text_masks(text, font, outline_width, size, (left, top))
+
+    stamp = Image.new("RGBA", size, tuple(fill[:3]) + (255,))
+    stamp.putalpha(fill_mask)
+    if outline_mask is not None:
+        # Wypełnienie nakładane na obwódkę jak drugi napis (ImageDraw.text):
+        # tam, gdzie obwódka jest półprzezroczysta, kolor nie może jej zastąpić
+        outline = Image.new("RGBA", size, tuple(outline_fill[:3]) + (255,))
+        outline.putalpha(outline_mask)
+        stamp = Image.alpha_composite(outline, stamp)
+
+    return stamp, (left, top)
+
+
+def draw_text(image, xy, text, font, outline_width, fill, outline_fill):
+    """Rysuje tekst z obwódką w punkcie `xy` (tak jak ImageDraw.text) korzystając z bufora stempli."""
+    stamp, (left, top) = text_stamp(text, font, outline_width,
+                                    tuple(fill), tuple(outline_fill))
+    alpha_composite_at(image, stamp, pixel(xy[0]) + left, pixel(xy[1]) + top)
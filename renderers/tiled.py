@@ -0,0 +1,193 @@
+"""
+Renderowanie kafelkami dla bardzo dużych map. Mapa jest dzielona na
+kafelki, każdy kafelek dostaje tylko obiekty, których prostokąty go
+przecinają, a gotowe pasy kafelków trafiają od razu do kodera PNG.
+Żaden obraz RGBA wielkości całej mapy nie powstaje.
+
+Mapy bazowe bez kompresji (PPM, BMP, TGA, nieskompresowany TIFF) są
+czytane pasami prosto z pliku. Skompresowane formaty (PNG, JPEG)
+PIL potrafi zdekodować tylko w całości - wtedy w pamięci jest jedna kopia
+mapy w jej oryginalnym trybie.
+"""
+import os
+import time
+import zlib
+import struct
+from PIL import Image
+import assets
+from .base import Viewport
+from .export import DEFAULT_PROFILE, ExportResult, get_profile
+from .pipeline import RenderCancelled, compose, job_placements
+from .profiling import stage
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+PNG_COLOR_TYPES = {"RGB": (2, 3), "RGBA": (6, 4)}
+
+
+class PngStreamWriter:
+    """
+    Zapisuje obraz RGB lub RGBA do PNG pasami wierszy, bez trzymania całego
+    obrazu w pamięci. Wiersze są zapisywane bez filtrów PNG (typ 0).
+    """
+    def __init__(self, path, width, height, compress_level=6, mode="RGBA"):
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.rows_written = 0
+        color_type, self.bytes_per_pixel = PNG_COLOR_TYPES[mode]
+        self.file = open(path, "wb")
+        self.compressor = zlib.compressobj(compress_level)
+        self.file.write(PNG_SIGNATURE)
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type, data):
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    def write(self, band):
+        """Dopisuje kolejny pas obrazu (tryb zapisu, pełna szerokość)."""
+        if band.size[0] != self.width or band.mode != self.mode:
+            raise ValueError(f"Pas musi mieć tryb {self.mode} i szerokość całego obrazu")
+        raw = band.tobytes()
+        stride = self.width * self.bytes_per_pixel
+        rows = b"".join(b"\x00" + raw[i:i + stride] for i in range(0, len(raw), stride))
+        compressed = self.compressor.compress(rows)
+        if compressed:
+            self._write_chunk(b"IDAT", compressed)
+        self.rows_written += band.size[1]
+
+    def abort(self):
+        """Zamyka i usuwa niedokończony plik."""
+        self.file.close()
+        os.remove(self.file.name)
+
+    def close(self):
+        if self.rows_written != self.height:
+            self.file.close()
+            raise ValueError(f"Zapisano {self.rows_written} z {self.height} wierszy")
+        self._write_chunk(b"IDAT", self.compressor.flush())
+        self._write_chunk(b"IEND", b"")
+        self.file.close()
+
+
+RAW_BYTES_PER_PIXEL = {
+    "L": 1, "P": 1, "RGB": 3, "BGR": 3,
+    "RGBA": 4, "BGRA": 4, "RGBX": 4, "BGRX": 4, "RGBa": 4,
+}
+
+
+class BaseMapSource:
+    """Dostęp do mapy bazowej pasami wierszy."""
+    def __init__(self, path):
+        self.image = assets.open_image(path, trusted=True)
+        self.size = self.image.size
+        self._file = None
+        self._layout = self._raw_layout()
+        if self._layout is not None:
+            self._file = open(path, "rb")
+
+    def _raw_layout(self):
+        """(offset, rawmode, stride, orientacja) dla map zapisanych bez kompresji, inaczej None."""
+        if len(self.image.tile) != 1:
+            return None
+        codec, extents, offset, args = self.image.tile[0]
+        if codec != "raw" or tuple(extents) != (0, 0) + self.size:
+            return None
+        if isinstance(args, str):
+            args = (args, 0, 1)
+        rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+        if rawmode not in RAW_BYTES_PER_PIXEL or orientation not in (1, -1):
+            return None
+        stride = stride or self.size[0] * RAW_BYTES_PER_PIXEL[rawmode]
+        return offset, rawmode, stride, orientation
+
+    def band(self, top, bottom):
+        """Zwraca wiersze [top, bottom) mapy jako obraz RGBA."""
+        width, height = self.size
+        if self._layout is None:
+            return self.image.crop((0, top, width, bottom)).convert("RGBA")
+
+        offset, rawmode, stride, orientation = self._layout
+        # Przy orientacji -1 (np. BMP) wiersze są zapisane od dołu
+        first_row = top if orientation == 1 else height - bottom
+        self._file.seek(offset + first_row * stride)
+        data = self._file.read((bottom - top) * stride)
+        band = Image.frombuffer(self.image.mode, (width, bottom - top), data, "raw", rawmode, stride, orientation)
+        return band.convert("RGBA")
+
+    def is_opaque(self):
+        """Czy mapa bazowa nie ma przezroczystości (wtedy wynik też jej nie ma)."""
+        return "A" not in self.image.getbands() and "transparency" not in self.image.info
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self.image.close()
+
+
+def render_tiled(job, output_path, tile_size=1024, progress=None, is_cancelled=None,
+                 profile_name=DEFAULT_PROFILE):
+    """
+    Renderuje mapę kafelkami `tile_size` x `tile_size` i zapisuje ją do PNG
+    strumieniowo. Szczytowe zużycie pamięci to jeden pas kafelków RGBA
+    (szerokość mapy x `tile_size`) zamiast kilku kopii całej mapy. Zwraca
+    ExportResult z łącznym czasem kodowania.
+    """
+    profile = get_profile(profile_name)
+    if profile.format != "PNG":
+        raise ValueError("Renderowanie kafelkami zapisuje tylko PNG - wybierz profil PNG")
+    if tile_size <= 0:
+        raise ValueError(f"Rozmiar kafelka musi być dodatni (podano {tile_size})")
+
+    source = BaseMapSource(job.map_path)
+    try:
+        width, height = source.size
+        rows = range(0, height, tile_size)
+        # Rysowanie na nieprzezroczystej mapie nie dodaje przezroczystości
+        mode = "RGB" if source.is_opaque() else "RGBA"
+        writer = PngStreamWriter(output_path, width, height,
+                                 profile.options.get("compress_level", 6), mode)
+        encode_seconds = 0
+        # Podpisy rozmieszczane raz dla całej mapy, żeby kafelki do siebie pasowały
+        with stage("labels"):
+            placements = job_placements(job)
+        try:
+            for step, top in enumerate(rows):
+                if is_cancelled and is_cancelled():
+                    raise RenderCancelled()
+                if progress:
+                    progress(step, len(rows), "kafelki")
+
+                with stage("decode"):
+                    band = source.band(top, min(top + tile_size, height))
+                for left in range(0, width, tile_size):
+                    box = (left, 0, min(left + tile_size, width), band.height)
+                    tile = compose(band.crop(box), job.sections, Viewport(left=left, top=top),
+                                   placements=placements)
+                    band.paste(tile, (left, 0))
+
+                start = time.perf_counter()
+                with stage("encode"):
+                    writer.write(band.convert(mode))
+                encode_seconds += time.perf_counter() - start
+        except BaseException:
+            writer.abort()
+            raise
+        start = time.perf_counter()
+        with stage("encode"):
+            writer.close()
+        encode_seconds += time.perf_counter() - start
+    finally:
+        source.close()
+
+    return ExportResult(
+        path=output_path,
+        profile=profile_name,
+        seconds=encode_seconds,
+        bytes=os.path.getsize(output_path),
+        dropped_alpha=mode == "RGB",
+    )
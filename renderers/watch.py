@@ -0,0 +1,189 @@
+"""
+Tryb obserwowania plików: po zmianie pliku warstwy (districts.json,
+speed_cameras.json, .feat) przerysowywane są tylko prostokąty obiektów
+dodanych, usuniętych lub przesuniętych - na poprzednim wyniku, zamiast
+całej mapy. Obiekty są porównywane jako zbiory wpisów (przesunięty obiekt to
+usunięty stary wpis i dodany nowy), a każdy brudny prostokąt jest składany od
+nowa ze wszystkich sekcji, tak jak kafelek przy renderowaniu kafelkami.
+
+Całą mapę trzeba przerysować, gdy zmieni się mapa bazowa, czcionka, ikonka
+albo ustawienia sekcji, a także gdy włączone jest rozmieszczanie podpisów -
+przesunięcie jednego podpisu może wtedy przesunąć podpisy w dowolnym miejscu.
+"""
+import json
+import math
+import threading
+from collections import Counter
+import assets
+from .base import Viewport
+from .layers import input_files
+from .pipeline import compose, get_renderer, job_placements
+
+# Zapas (w pikselach obrazu) wokół brudnych prostokątów i składanych fragmentów: w podglądzie
+# kółka, ikonki i obwódki mają najmniejsze rozmiary w pikselach i mogą wystawać poza
+# przeskalowane prostokąty swoich obiektów
+PATCH_MARGIN = 8
+
+
+def feature_key(feature):
+    return json.dumps(feature, sort_keys=True)
+
+
+def snapshot_features(path):
+    """
+    {klucz wpisu: obiekt} i liczności kluczy (Counter) obiektów z pliku warstwy
+    `path`. Brak pliku to pusta warstwa; błąd składni (plik w trakcie zapisu)
+    jest zgłaszany wyjątkiem.
+    """
+    features = {}
+    counts = Counter()
+    try:
+        loaded = assets.load_features(path)
+    except OSError:
+        return features, counts
+    for feature in loaded:
+        key = feature_key(feature)
+        features[key] = feature
+        counts[key] += 1
+    return features, counts
+
+
+def merge_rects(rects):
+    """Łączy nachodzące na siebie lub stykające się prostokąty w ich obwiednie."""
+    merged = []
+    for rect in rects:
+        while True:
+            for index, other in enumerate(merged):
+                if rect[0] <= other[2] and other[0] <= rect[2] and rect[1] <= other[3] and other[1] <= rect[3]:
+                    rect = (min(rect[0], other[0]), min(rect[1], other[1]),
+                            max(rect[2], other[2]), max(rect[3], other[3]))
+                    del merged[index]
+                    break
+            else:
+                break
+        merged.append(rect)
+    return merged
+
+
+class MapWatcher:
+    """
+    Ostatni wynik renderowania `job` razem ze stanem plików, z których
+    powstał. `update` przerysowuje tylko to, co się zmieniło od poprzedniego
+    wywołania. Z `preview_size` mapa jest renderowana w skali podglądu
+    (pomniejszona kopia mapy bazowej, jak preview.render_preview).
+    """
+    def __init__(self, preview_size=None):
+        self.preview_size = preview_size
+        self.image = None
+        self._job_key = None
+        self._inputs = None
+        self._features = {}
+        self._lock = threading.Lock()
+
+    def signatures(self, job):
+        """{ścieżka: sygnatura} mapy bazowej i plików wszystkich włączonych sekcji."""
+        paths = [job.map_path]
+        for settings in job.sections:
+            if settings.enabled:
+                paths.extend(input_files(settings))
+        return {path: assets.file_signature(path) for path in paths}
+
+    def changed(self, job):
+        """
+        Czy któryś z plików `job` zmienił się od ostatniego `update`. Przy
+        pierwszym wywołaniu zapamiętuje stan plików i zwraca False.
+        """
+        inputs = self.signatures(job)
+        with self._lock:
+            if self._inputs is None:
+                self._inputs = inputs
+                return False
+            return inputs != self._inputs
+
+    def base(self, job):
+        """Mapa bazowa i skala renderowania."""
+        if self.preview_size is None:
+            return assets.load_map(job.map_path), 1.0
+        base = assets.load_thumbnail(job.map_path, self.preview_size)
+        return base, base.width / assets.load_map(job.map_path).width
+
+    def update(self, job, is_cancelled=None):
+        """
+        Uaktualnia wynik do bieżącego stanu plików i ustawień `job`. Zwraca
+        (obraz, przerysowane prostokąty w pikselach obrazu). Obraz jest
+        zmieniany w miejscu przy kolejnych wywołaniach.
+        """
+        inputs = self.signatures(job)
+        job_key = json.dumps(job.to_dict(), sort_keys=True)
+        base, scale = self.base(job)
+        with self._lock:
+            previous_inputs = self._inputs
+
+        changes = None
+        if self.image is not None and job_key == self._job_key and self.image.size == base.size:
+            changes = self.changed_features(job, previous_inputs or {}, inputs)
+
+        if changes is None:
+            self.image = compose(base, job.sections, Viewport(scale=scale), is_cancelled=is_cancelled,
+                                 placements=job_placements(job))
+            self._features = {settings.name: (settings.data_path,) + snapshot_features(settings.data_path)
+                              for settings in job.sections if settings.enabled and hasattr(settings, "data_path")}
+            rects = [(0, 0) + self.image.size]
+        else:
+            dirty, snapshots = changes
+            rects = []
+            for rect in merge_rects(dirty):
+                rect = (max(0, math.floor(rect[0] * scale) - PATCH_MARGIN),
+                        max(0, math.floor(rect[1] * scale) - PATCH_MARGIN),
+                        min(base.width, math.ceil(rect[2] * scale) + PATCH_MARGIN),
+                        min(base.height, math.ceil(rect[3] * scale) + PATCH_MARGIN))
+                if rect[0] < rect[2] and rect[1] < rect[3]:
+                    rects.append(rect)
+            for rect in merge_rects(rects):
+                # Fragment jest składany z zapasem i przycinany, żeby objąć też obiekty tuż obok
+                outer = (max(0, rect[0] - PATCH_MARGIN), max(0, rect[1] - PATCH_MARGIN),
+                         min(base.width, rect[2] + PATCH_MARGIN), min(base.height, rect[3] + PATCH_MARGIN))
+                tile = compose(base.crop(outer), job.sections,
+                               Viewport(scale=scale, left=outer[0] / scale, top=outer[1] / scale),
+                               is_cancelled=is_cancelled)
+                self.image.paste(tile.crop((rect[0] - outer[0], rect[1] - outer[1],
+                                            rect[2] - outer[0], rect[3] - outer[1])), rect[:2])
+            self._features.update(snapshots)
+
+        self._job_key = job_key
+        with self._lock:
+            self._inputs = inputs
+        return self.image, rects
+
+    def changed_features(self, job, previous, inputs):
+        """
+        (prostokąty obiektów, które zmieniły się w plikach warstw - we
+        współrzędnych mapy, nowe migawki warstw) albo None, gdy trzeba
+        przerysować całą mapę.
+        """
+        data_paths = {settings.data_path for settings in job.sections
+                      if settings.enabled and hasattr(settings, "data_path")}
+        for path, signature in inputs.items():
+            if previous.get(path) != signature and path not in data_paths:
+                return None
+
+        rects = []
+        snapshots = {}
+        for settings in job.sections:
+            if not settings.enabled or not hasattr(settings, "data_path"):
+                continue
+            old_path, old_features, old_counts = self._features[settings.name]
+            if previous.get(settings.data_path) == inputs[settings.data_path] and old_path == settings.data_path:
+                continue
+            features, counts = snapshot_features(settings.data_path)
+            snapshots[settings.name] = (settings.data_path, features, counts)
+
+            renderer = get_renderer(settings.name)
+            for key in old_counts - counts:
+                rects.append(renderer.feature_bounds(settings, old_features[key]))
+            for key in counts - old_counts:
+                rects.append(renderer.feature_bounds(settings, features[key]))
+
+        if rects and job.place_labels:
+            return None
+        return rects, snapshots
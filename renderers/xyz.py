@@ -0,0 +1,192 @@
+"""
+Eksport mapy jako piramidy kafelków z/x/y dla przeglądarek map (Leaflet,
+OpenLayers). Najwyższy poziom powiększenia to mapa w pełnej rozdzielczości,
+każdy niższy powstaje z poprzedniego (TilePyramid). Skrót zawartości każdego
+kafelka trafia do manifest.json, więc przy kolejnym eksporcie do tego samego
+katalogu zapisywane są tylko kafelki, które się zmieniły.
+"""
+import os
+import json
+import time
+import hashlib
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from .export import DEFAULT_PROFILE, get_profile, is_opaque
+from .pipeline import RenderCancelled, render_map
+from .profiling import stage
+from .pyramid import TilePyramid
+
+XYZ_TILE_SIZE = 256
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass
+class TileExportResult:
+    path: str
+    profile: str
+    seconds: float
+    max_zoom: int
+    written: int
+    unchanged: int
+    removed: int
+
+    def summary(self):
+        return (f"{self.path} [{self.profile}]: poziomy 0-{self.max_zoom}, "
+                f"zapisane kafelki {self.written}, bez zmian {self.unchanged}, usunięte {self.removed}, "
+                f"{self.seconds:.2f} s")
+
+
+def tile_path(output_dir, z, x, y, extension):
+    return os.path.join(output_dir, str(z), str(x), f"{y}{extension}")
+
+
+def load_manifest(path):
+    """Manifest poprzedniego eksportu do tego katalogu albo pusty słownik."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(path, manifest):
+    """Zapisuje manifest w całości albo wcale (plik tymczasowy zamieniany na docelowy)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, path)
+
+
+def manifest_paths(output_dir, manifest):
+    """Ścieżki wszystkich kafelków zapisanych w `manifest`."""
+    try:
+        extension = get_profile(manifest["profile"]).extension
+    except (KeyError, ValueError):
+        return set()
+    paths = set()
+    for key in manifest.get("tiles", {}):
+        z, column, row = key.split("/")
+        paths.add(tile_path(output_dir, z, column, row, extension))
+    return paths
+
+
+def write_tile(pyramid, level, column, row, path, previous_digest, profile, mode):
+    """
+    Wycina kafelek (kafelki brzegowe dopełnia do pełnego rozmiaru), liczy skrót
+    jego pikseli i zapisuje go tylko wtedy, gdy skrót różni się od poprzedniego.
+    Zwraca (skrót, czy zapisano).
+    """
+    tile = pyramid.tile(level, column, row)
+    size = pyramid.tile_size
+    if tile.size != (size, size):
+        padded = Image.new(mode, (size, size))
+        padded.paste(tile, (0, 0))
+        tile = padded
+
+    digest = hashlib.sha1(tile.tobytes()).hexdigest()
+    if digest == previous_digest and os.path.exists(path):
+        return digest, False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tile.save(path, format=profile.format, **profile.options)
+    return digest, True
+
+
+def export_tiles(job, output_dir, tile_size=XYZ_TILE_SIZE, profile_name=DEFAULT_PROFILE, workers=None,
+                 progress=None, is_cancelled=None, layer_cache=None):
+    """
+    Renderuje mapę `job` i zapisuje ją do `output_dir` jako kafelki
+    z/x/y.<rozszerzenie profilu>. Kafelki są wycinane, haszowane i kodowane
+    równolegle w `workers` wątkach (Pillow i hashlib zwalniają GIL podczas
+    kodowania i liczenia skrótu). Kafelki, których już nie ma w piramidzie
+    (np. po zmniejszeniu mapy lub zmianie rozmiaru kafelka), są usuwane.
+    Zwraca TileExportResult.
+    """
+    profile = get_profile(profile_name)
+    start = time.perf_counter()
+
+    image = render_map(job, is_cancelled=is_cancelled, layer_cache=layer_cache)
+    mode = "RGBA" if profile.supports_alpha and not is_opaque(image) else "RGB"
+    if image.mode != mode:
+        image = image.convert(mode)
+
+    with stage("pyramid"):
+        pyramid = TilePyramid(image, tile_size)
+    max_zoom = pyramid.level_count - 1
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    # Po zmianie rozmiaru kafelka lub profilu zapisu skróty nie pasują - zapisujemy wszystko
+    same_layout = manifest.get("tile_size") == tile_size and manifest.get("profile") == profile_name
+    previous = manifest.get("tiles", {}) if same_layout else {}
+    tiles = {}
+    paths = set()
+    submitted = set()
+    written = 0
+    removed = 0
+    finished = False
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for level in range(pyramid.level_count):
+                if is_cancelled and is_cancelled():
+                    raise RenderCancelled()
+                z = max_zoom - level
+                if progress:
+                    progress(level, pyramid.level_count, f"poziom {z}")
+
+                columns, rows = pyramid.tile_range(level, (0, 0) + pyramid.size)
+                futures = {}
+                for column in columns:
+                    for row in rows:
+                        key = f"{z}/{column}/{row}"
+                        path = tile_path(output_dir, z, column, row, profile.extension)
+                        paths.add(path)
+                        submitted.add(key)
+                        futures[key] = pool.submit(write_tile, pyramid, level, column, row, path,
+                                                   previous.get(key), profile, mode)
+                with stage("encode"):
+                    for key, future in futures.items():
+                        tiles[key], was_written = future.result()
+                        written += was_written
+
+        for path in manifest_paths(output_dir, manifest) - paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        finished = True
+    finally:
+        if not finished:
+            # Przerwany eksport: kafelki jeszcze nieodwiedzone mają na dysku starą zawartość
+            # i zachowują stary skrót; kafelek wysłany do zapisu bez znanego wyniku mógł już
+            # zostać nadpisany, więc traci skrót i następny eksport zapisze go ponownie
+            kept = {key: digest for key, digest in previous.items() if key not in submitted}
+            tiles = {**kept, **tiles}
+            if not same_layout:
+                # Kafelki starego układu nie trafią do nowego manifestu - usuwamy je od razu
+                for path in manifest_paths(output_dir, manifest) - paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+        write_manifest(manifest_path, {
+            "tile_size": tile_size,
+            "profile": profile_name,
+            "size": list(pyramid.size),
+            "max_zoom": max_zoom,
+            "tiles": tiles,
+        })
+
+    return TileExportResult(
+        path=output_dir,
+        profile=profile_name,
+        seconds=time.perf_counter() - start,
+        max_zoom=max_zoom,
+        written=written,
+        unchanged=len(tiles) - written,
+        removed=removed,
+    )
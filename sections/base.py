@@ -1,6 +1,17 @@
 from PyQt6.QtWidgets import QWidget
 
 class Section:
+    changed_callback = None
+
+    @property
+    def renderer(self):
+        """
+        Renderer sekcji z rejestru (renderers.pipeline.get_renderer). Renderery
+        i Pillow są importowane dopiero przy pierwszym użyciu, nie przy starcie okna.
+        """
+        from renderers.pipeline import get_renderer
+        return get_renderer(self.get_name())
+
     def get_name(self) -> str:
         raise NotImplementedError
 
@@ -10,5 +21,15 @@ class Section:
     def is_enabled(self) -> bool:
         raise NotImplementedError
 
+    def get_settings(self):
+        raise NotImplementedError
+
+    def connect_changed(self, callback):
+        self.changed_callback = callback
+
+    def notify_changed(self):
+        if self.changed_callback:
+            self.changed_callback()
+
     def render(self, image, draw):
-        raise NotImplementedError
\ No newline at end of file
+        self.renderer.render(image, draw, self.get_settings())
@@ -0,0 +1,91 @@
+from PyQt6.QtWidgets import (
+    QGroupBox, QVBoxLayout, QLabel, QSpinBox, QDoubleSpinBox, QPushButton, QColorDialog, QCheckBox
+)
+from PyQt6.QtGui import QColor
+from .base import Section
+
+# Opis sekcji dla sections.registry (odczytywany bez importowania modułu)
+SECTION_INFO = {"name": "coverage", "title": "Mapa pokrycia fotoradarami", "class": "CoverageSection",
+                "renderer": "renderers.coverage:CoverageRenderer", "enabled": False, "order": 0}
+
+class CoverageSection(Section):
+    def __init__(self):
+        self.enabled_checkbox = QCheckBox("Generuj mapę pokrycia fotoradarami")
+        self.enabled_checkbox.setChecked(False)
+
+        self.radius_spinner = QSpinBox()
+        self.radius_spinner.setRange(10, 500)
+        self.radius_spinner.setValue(60)
+
+        self.cell_size_spinner = QSpinBox()
+        self.cell_size_spinner.setRange(1, 32)
+        self.cell_size_spinner.setValue(8)
+
+        self.saturation_spinner = QDoubleSpinBox()
+        self.saturation_spinner.setRange(0.5, 50.0)
+        self.saturation_spinner.setSingleStep(0.5)
+        self.saturation_spinner.setValue(3.0)
+
+        self.opacity_spinner = QSpinBox()
+        self.opacity_spinner.setRange(0, 255)
+        self.opacity_spinner.setValue(170)
+
+        self.low_color = QColor(255, 210, 0)
+        self.high_color = QColor(220, 0, 0)
+        self.low_color_btn = QPushButton("Kolor małego pokrycia")
+        self.low_color_btn.clicked.connect(self.choose_low_color)
+        self.high_color_btn = QPushButton("Kolor dużego pokrycia")
+        self.high_color_btn.clicked.connect(self.choose_high_color)
+
+        self.widget = QGroupBox("Ustawienia mapy pokrycia")
+        layout = QVBoxLayout()
+        layout.addWidget(self.enabled_checkbox)
+        layout.addWidget(QLabel("Promień zasięgu fotoradaru:"))
+        layout.addWidget(self.radius_spinner)
+        layout.addWidget(QLabel("Dokładność (piksele na komórkę, mniej = dokładniej):"))
+        layout.addWidget(self.cell_size_spinner)
+        layout.addWidget(QLabel("Liczba nakładających się fotoradarów dla pełnego koloru:"))
+        layout.addWidget(self.saturation_spinner)
+        layout.addWidget(QLabel("Krycie (0-255):"))
+        layout.addWidget(self.opacity_spinner)
+        layout.addWidget(self.low_color_btn)
+        layout.addWidget(self.high_color_btn)
+        self.widget.setLayout(layout)
+
+        self.enabled_checkbox.toggled.connect(self.notify_changed)
+        self.radius_spinner.valueChanged.connect(self.notify_changed)
+        self.cell_size_spinner.valueChanged.connect(self.notify_changed)
+        self.saturation_spinner.valueChanged.connect(self.notify_changed)
+        self.opacity_spinner.valueChanged.connect(self.notify_changed)
+
+    def get_name(self):
+        return "coverage"
+
+    def get_widget(self):
+        return self.widget
+
+    def is_enabled(self):
+        return self.enabled_checkbox.isChecked()
+
+    def choose_low_color(self):
+        color = QColorDialog.getColor(self.low_color)
+        if color.isValid():
+            self.low_color = color
+            self.notify_changed()
+
+    def choose_high_color(self):
+        color = QColorDialog.getColor(self.high_color)
+        if color.isValid():
+            self.high_color = color
+            self.notify_changed()
+
+    def get_settings(self):
+        return self.renderer.settings_class(
+            enabled=self.is_enabled(),
+            radius=self.radius_spinner.value(),
+            cell_size=self.cell_size_spinner.value(),
+            saturation=self.saturation_spinner.value(),
+            opacity=self.opacity_spinner.value(),
+            low_color=self.low_color.getRgb()[:3],
+            high_color=self.high_color.getRgb()[:3]
+        )
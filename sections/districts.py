@@ -1,10 +1,11 @@
-import json
-import textwrap
 from PyQt6.QtWidgets import QGroupBox, QVBoxLayout, QLabel, QLineEdit, QSpinBox, QPushButton, QColorDialog, QCheckBox
 from PyQt6.QtGui import QColor, QFont
-from PIL import ImageDraw, ImageFont
 from .base import Section
 
+# Opis sekcji dla sections.registry (odczytywany bez importowania modułu)
+SECTION_INFO = {"name": "districts", "title": "Nazwy dzielnic", "class": "DistrictsSection",
+                "renderer": "renderers.districts:DistrictsRenderer", "enabled": True, "order": 20}
+
 class DistrictsSection(Section):
     def __init__(self):
         self.enabled_checkbox = QCheckBox("Generuj nazwy dzielnic")
@@ -46,6 +47,12 @@ class DistrictsSection(Section):
         layout.addWidget(self.outline_btn)
         self.widget.setLayout(layout)
 
+        self.enabled_checkbox.toggled.connect(self.notify_changed)
+        self.font_input.editingFinished.connect(self.notify_changed)
+        self.font_size_spinner.valueChanged.connect(self.notify_changed)
+        self.wrap_spinner.valueChanged.connect(self.notify_changed)
+        self.outline_spinner.valueChanged.connect(self.notify_changed)
+
     def get_name(self):
         return "districts"
 
@@ -59,50 +66,21 @@ class DistrictsSection(Section):
         color = QColorDialog.getColor()
         if color.isValid():
             self.text_color = color
+            self.notify_changed()
 
     def choose_outline_color(self):
         color = QColorDialog.getColor()
         if color.isValid():
             self.outline_color = color
-
-    def render(self, image, draw):
-        try:
-            with open("resources/districts.json", "r", encoding="utf-8") as f:
-                districts = json.load(f)
-
-            font_path = self.font_input.text()
-            font_size = self.font_size_spinner.value()
-            wrap_limit = self.wrap_spinner.value()
-            outline_width = self.outline_spinner.value()
-            line_spacing = 4
-
-            font = ImageFont.truetype(font_path, font_size)
-
-            for district in districts:
-                name = district["name"]
-                x, y = district["x"], district["y"]
-
-                lines = textwrap.wrap(
-                    name,
-                    width=wrap_limit,
-                    break_long_words=False,
-                    break_on_hyphens=False
-                )
-
-                total_height = len(lines) * (font_size + line_spacing)
-                start_y = y - total_height // 2
-
-                for i, line in enumerate(lines):
-                    text_width = font.getlength(line)
-                    line_x = x - text_width / 2
-                    line_y = start_y + i * (font_size + line_spacing)
-
-                    for dx in range(-outline_width, outline_width + 1):
-                        for dy in range(-outline_width, outline_width + 1):
-                            if dx != 0 or dy != 0:
-                                draw.text((line_x + dx, line_y + dy), line, font=font, fill=self.outline_color.getRgb()[:3])
-
-                    draw.text((line_x, line_y), line, font=font, fill=self.text_color.getRgb()[:3])
-
-        except Exception as e:
-            print(f"[DistrictsSection] Błąd: {e}")
\ No newline at end of file
+            self.notify_changed()
+
+    def get_settings(self):
+        return self.renderer.settings_class(
+            enabled=self.is_enabled(),
+            font_path=self.font_input.text(),
+            font_size=self.font_size_spinner.value(),
+            wrap_limit=self.wrap_spinner.value(),
+            outline_width=self.outline_spinner.value(),
+            text_color=self.text_color.getRgb()[:3],
+            outline_color=self.outline_color.getRgb()[:3]
+        )
@@ -0,0 +1,63 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QToolButton
+from PyQt6.QtCore import Qt
+from .base import Section
+
+class LazySection(Section):
+    """
+    Zwijany panel sekcji z rejestru (sections.registry). Moduł sekcji jest
+    importowany, a jej widżety tworzone dopiero przy pierwszym rozwinięciu
+    panelu; sekcje włączone domyślnie są tworzone od razu. Niezbudowana
+    sekcja jest wyłączona i nie trafia do zlecenia renderowania.
+    """
+    def __init__(self, info):
+        self.info = info
+        self.section = None
+
+        self.toggle_btn = QToolButton()
+        self.toggle_btn.setText(info.title)
+        self.toggle_btn.setCheckable(True)
+        self.toggle_btn.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
+        self.toggle_btn.setArrowType(Qt.ArrowType.RightArrow)
+        self.toggle_btn.toggled.connect(self.set_expanded)
+
+        self.widget = QWidget()
+        self.layout = QVBoxLayout()
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.layout.addWidget(self.toggle_btn)
+        self.widget.setLayout(self.layout)
+
+        if info.enabled:
+            self.toggle_btn.setChecked(True)
+
+    def build(self):
+        if self.section is None:
+            self.section = self.info.load()
+            self.layout.addWidget(self.section.get_widget())
+            if self.changed_callback:
+                self.section.connect_changed(self.changed_callback)
+        return self.section
+
+    def set_expanded(self, expanded):
+        self.toggle_btn.setArrowType(Qt.ArrowType.DownArrow if expanded else Qt.ArrowType.RightArrow)
+        if expanded:
+            self.build()
+        if self.section is not None:
+            self.section.get_widget().setVisible(expanded)
+
+    def get_name(self):
+        return self.info.name
+
+    def get_widget(self):
+        return self.widget
+
+    def is_enabled(self):
+        return self.section is not None and self.section.is_enabled()
+
+    def get_settings(self):
+        """Ustawienia zbudowanej sekcji albo None, jeśli panel nie był jeszcze rozwijany."""
+        return self.section.get_settings() if self.section is not None else None
+
+    def connect_changed(self, callback):
+        super().connect_changed(callback)
+        if self.section is not None:
+            self.section.connect_changed(callback)
@@ -0,0 +1,91 @@
+"""
+Rejestr sekcji (wtyczek) okna main.py i rendererów. Sekcje są wykrywane bez
+importowania ich modułów: z każdego pliku katalogu sections/ odczytywany jest
+(przez ast) słownik SECTION_INFO - nowa sekcja to nowy plik w tym katalogu.
+Moduł sekcji jest importowany dopiero w SectionInfo.load - gdy sekcja jest
+włączona albo użytkownik rozwinie jej panel (sections.lazy.LazySection).
+Renderer sekcji (pole "renderer") wczytuje renderers.pipeline.get_renderer,
+więc rejestr jest jedynym spisem sekcji także przy renderowaniu bez GUI.
+Moduł nie importuje PyQt6.
+
+Punkty wejścia pakietów (importlib.metadata) nie są przeszukiwane: sam import
+importlib.metadata wydłuża start programu o kilkadziesiąt milisekund.
+
+    SECTION_INFO = {"name": "districts", "title": "Nazwy dzielnic",
+                    "class": "DistrictsSection", "renderer": "renderers.districts:DistrictsRenderer",
+                    "enabled": True, "order": 20}
+"""
+import os
+import ast
+import importlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+SECTIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Moduły pakietu, które nie są sekcjami
+NOT_SECTIONS = {"__init__", "base", "lazy", "registry"}
+
+
+@dataclass(frozen=True)
+class SectionInfo:
+    name: str
+    title: str
+    target: str
+    enabled: bool = True
+    order: int = 100
+    renderer: str = None
+
+    def load(self):
+        """Importuje moduł sekcji i zwraca nową sekcję."""
+        return load_target(self.target)
+
+    def load_renderer(self):
+        """Importuje moduł renderera sekcji (bez PyQt6) i zwraca nowy renderer albo None."""
+        return load_target(self.renderer) if self.renderer else None
+
+
+def load_target(target):
+    """Tworzy obiekt klasy wskazanej jako "moduł:Klasa"."""
+    module_name, class_name = target.split(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def read_section_info(path, module_name):
+    """SectionInfo z literału SECTION_INFO w pliku `path` (bez importowania go) albo None."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+                isinstance(target, ast.Name) and target.id == "SECTION_INFO" for target in node.targets):
+            data = ast.literal_eval(node.value)
+            return SectionInfo(
+                name=data["name"],
+                title=data.get("title", data["name"]),
+                target=f"{module_name}:{data['class']}",
+                enabled=data.get("enabled", True),
+                order=data.get("order", 100),
+                renderer=data.get("renderer"),
+            )
+    return None
+
+
+def discover_sections(directory=SECTIONS_DIR, package="sections"):
+    """Lista SectionInfo z katalogu `directory` w kolejności rysowania (`order`, potem nazwa)."""
+    found = {}
+    for file_name in sorted(os.listdir(directory)):
+        module, extension = os.path.splitext(file_name)
+        if extension != ".py" or module in NOT_SECTIONS:
+            continue
+        info = read_section_info(os.path.join(directory, file_name), f"{package}.{module}")
+        if info is not None:
+            found.setdefault(info.name, info)
+
+    return sorted(found.values(), key=lambda info: (info.order, info.name))
+
+
+@lru_cache(maxsize=1)
+def registered_sections():
+    """discover_sections() dla katalogu sections/, odczytane raz na proces."""
+    return tuple(discover_sections())
+
@@ -1,29 +1,35 @@
-import sys
-import os
-import json
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QFileDialog, QLineEdit, QMessageBox, QInputDialog, QScrollArea, QGroupBox, QSpinBox, QColorDialog, QCheckBox
+    QWidget, QVBoxLayout, QLabel, QPushButton, QLineEdit, QGroupBox, QSpinBox, QColorDialog, QCheckBox
 )
-from PyQt6.QtGui import QPixmap, QImage, QPainter, QColor, QFont
-from PyQt6.QtCore import Qt, QPoint, pyqtSignal 
-
-from PIL import Image, ImageDraw, ImageFont 
-from PIL.ImageQt import ImageQt 
+from PyQt6.QtGui import QColor
 
 try:
     from .base import Section
 except ImportError:
     
     class Section:
+        renderer = None
+        changed_callback = None
+
         def get_name(self) -> str:
             raise NotImplementedError
         def get_widget(self) -> QWidget:
             raise NotImplementedError
         def is_enabled(self) -> bool:
             raise NotImplementedError
-        def render(self, image, draw):
+        def get_settings(self):
             raise NotImplementedError
+        def connect_changed(self, callback):
+            self.changed_callback = callback
+        def notify_changed(self):
+            if self.changed_callback:
+                self.changed_callback()
+        def render(self, image, draw):
+            self.renderer.render(image, draw, self.get_settings())
+
+# Opis sekcji dla sections.registry (odczytywany bez importowania modułu)
+SECTION_INFO = {"name": "speed_cameras", "title": "Fotoradary", "class": "SpeedCamerasSection",
+                "renderer": "renderers.speed_cameras:SpeedCamerasRenderer", "enabled": True, "order": 10}
 
 class SpeedCamerasSection(Section):
     def __init__(self):
@@ -78,6 +84,13 @@ class SpeedCamerasSection(Section):
         layout.addWidget(self.text_outline_width_spinner)
         self.widget.setLayout(layout)
 
+        self.enabled_checkbox.toggled.connect(self.notify_changed)
+        self.circle_radius_spinner.valueChanged.connect(self.notify_changed)
+        self.show_speed_checkbox.toggled.connect(self.notify_changed)
+        self.font_input.editingFinished.connect(self.notify_changed)
+        self.font_size_spinner.valueChanged.connect(self.notify_changed)
+        self.text_outline_width_spinner.valueChanged.connect(self.notify_changed)
+
     def get_name(self):
         return "speed_cameras"
 
@@ -91,111 +104,36 @@ class SpeedCamerasSection(Section):
         color = QColorDialog.getColor(self.circle_color)
         if color.isValid():
             self.circle_color = color
+            self.notify_changed()
 
     def choose_icon_color(self):
         color = QColorDialog.getColor(self.icon_color)
         if color.isValid():
             self.icon_color = color
+            self.notify_changed()
 
     def choose_text_color(self):
         color = QColorDialog.getColor(self.text_color)
         if color.isValid():
             self.text_color = color
+            self.notify_changed()
 
     def choose_text_outline_color(self):
         color = QColorDialog.getColor(self.text_outline_color)
         if color.isValid():
             self.text_outline_color = color
-
-    def render(self, image, draw):
-        try:
-            import json
-            
-            json_path = "resources/speed_cameras.json"
-            if not os.path.exists(json_path):
-                print(f"[SpeedCamerasSection] Błąd: Plik '{json_path}' nie istnieje. Nie można wyrenderować fotoradarów.")
-                return
-
-            with open(json_path, "r", encoding="utf-8") as f:
-                speed_cameras_data = json.load(f)
-
-            circle_radius = self.circle_radius_spinner.value()
-            
-            circle_fill_color = self.circle_color.getRgb()
-
-            icon_path = "resources/radar.png"
-            radar_icon = None
-            if os.path.exists(icon_path):
-                radar_icon = Image.open(icon_path).convert("RGBA")
-                
-                icon_size = int(circle_radius * 0.5) 
-                if icon_size < 10: icon_size = 10 
-                radar_icon = radar_icon.resize((icon_size, icon_size), Image.Resampling.LANCZOS)
-
-                icon_tint_color = self.icon_color.getRgb()
-                
-                colored_icon = Image.new("RGBA", radar_icon.size, icon_tint_color)
-                
-                radar_icon_data = radar_icon.getdata()
-                new_icon_data = []
-                for item in radar_icon_data:
-                    
-                    new_icon_data.append((icon_tint_color[0], icon_tint_color[1], icon_tint_color[2], item[3]))
-                colored_icon.putdata(new_icon_data)
-                radar_icon = colored_icon
-            else:
-                print(f"[SpeedCamerasSection] Ostrzeżenie: Plik ikonki '{icon_path}' nie istnieje. Fotoradary będą renderowane bez ikon.")
-
-            font_path = self.font_input.text()
-            font_size = self.font_size_spinner.value()
-            try:
-                if not os.path.exists(font_path):
-                    font = ImageFont.load_default()
-                else:
-                    font = ImageFont.truetype(font_path, font_size)
-            except Exception:
-                font = ImageFont.load_default()
-
-            text_fill_color = self.text_color.getRgb()[:3]
-            text_outline_color = self.text_outline_color.getRgb()[:3]
-            text_outline_width = self.text_outline_width_spinner.value()
-            show_speed = self.show_speed_checkbox.isChecked()
-
-            for camera in speed_cameras_data:
-                name = camera["name"] 
-                x, y = camera["x"], camera["y"]
-                speed = camera.get("speed", "") 
-                
-                temp_circle_image = Image.new("RGBA", image.size, (0,0,0,0))
-                temp_draw = ImageDraw.Draw(temp_circle_image)
-                temp_draw.ellipse((x - circle_radius, y - circle_radius, x + circle_radius, y + circle_radius),
-                                  fill=circle_fill_color) 
-                image.alpha_composite(temp_circle_image)
-
-                if radar_icon:
-                    icon_x = x - radar_icon.width // 2
-                    icon_y = y - radar_icon.height // 2
-
-                    image.paste(radar_icon, (icon_x, icon_y), radar_icon)
-
-                
-                if show_speed and speed:
-                    text_to_draw = speed
-                    
-                    bbox = draw.textbbox((0,0), text_to_draw, font=font)
-                    text_width = bbox[2] - bbox[0]
-                    text_height = bbox[3] - bbox[1]
-
-                    text_y_start = y + icon_size / 2 
-                    text_y = text_y_start - text_height + 10 
-                    
-                    text_x = x - text_width / 2
-
-                    for dx in range(-text_outline_width, text_outline_width + 1):
-                        for dy in range(-text_outline_width, text_outline_width + 1):
-                            if dx != 0 or dy != 0:
-                                draw.text((text_x + dx, text_y + dy), text_to_draw, font=font, fill=text_outline_color)
-                    draw.text((text_x, text_y), text_to_draw, font=font, fill=text_fill_color)
-
-        except Exception as e:
-            print(f"[SpeedCamerasSection] Błąd renderowania: {e}")
+            self.notify_changed()
+
+    def get_settings(self):
+        return self.renderer.settings_class(
+            enabled=self.is_enabled(),
+            circle_radius=self.circle_radius_spinner.value(),
+            circle_color=self.circle_color.getRgb(),
+            icon_color=self.icon_color.getRgb(),
+            show_speed=self.show_speed_checkbox.isChecked(),
+            font_path=self.font_input.text(),
+            font_size=self.font_size_spinner.value(),
+            text_color=self.text_color.getRgb()[:3],
+            text_outline_color=self.text_outline_color.getRgb()[:3],
+            text_outline_width=self.text_outline_width_spinner.value()
+        )
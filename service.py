@@ -0,0 +1,222 @@
+"""
+Lokalna usługa HTTP renderująca mapy na zamówienie (dla bota Discorda,
+panelu administracyjnego i skryptów), bez uruchamiania okna programu.
+
+Proces działa długo, więc zdekodowane mapy, czcionki, indeksy warstw i
+warstwy sekcji zostają w pamięci między zleceniami, a gotowe mapy trafiają
+do bufora na dysku (renderers.output_cache). Jednoczesne identyczne
+zlecenia są łączone w jedno renderowanie, a liczbę równoległych renderowań
+ogranicza pula wątków.
+
+    python service.py --port 8765
+    python service.py --client ustawienia.json -o mapa.png
+
+Zlecenie to POST /render z treścią JSON w formacie pliku ustawień
+(`python render.py --write-default`) i opcjonalnym polem "profile".
+Odpowiedź to plik mapy wysyłany kawałkami. GET /status zwraca liczniki.
+Usługa słucha tylko na 127.0.0.1.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from renderers import LayerCache, RenderJob, load_job
+from renderers.export import DEFAULT_PROFILE, get_profile
+from renderers.output_cache import OutputCache, export_cached, job_digest
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+
+# Największa akceptowana treść zlecenia - ustawienia mapy to kilka kB
+MAX_REQUEST_BYTES = 1024 * 1024
+STREAM_CHUNK = 256 * 1024
+
+CONTENT_TYPES = {"PNG": "image/png", "WEBP": "image/webp", "JPEG": "image/jpeg"}
+
+
+class RenderService:
+    """
+    Renderowanie zleceń w puli `workers` wątków. Zlecenia o tym samym kluczu
+    (output_cache.job_digest), które przyjdą w trakcie renderowania, czekają
+    na ten sam wynik zamiast renderować mapę drugi raz.
+    """
+    def __init__(self, workers=DEFAULT_WORKERS, output_cache=None, layer_cache=None):
+        self.output_cache = output_cache or OutputCache()
+        self.layer_cache = layer_cache or LayerCache(max_layers=8)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rendered": 0, "cached": 0, "coalesced": 0, "failed": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _render(self, job, profile_name):
+        result = export_cached(job, self.output_cache, profile_name, layer_cache=self.layer_cache)
+        self._count("cached" if result.cached else "rendered")
+        return result
+
+    def submit(self, job, profile_name=DEFAULT_PROFILE):
+        """
+        Zwraca (Future z ExportResult, czy dołączono do trwającego renderowania).
+        Przyszły wynik wskazuje plik w buforze wyników.
+        """
+        get_profile(profile_name)
+        digest = job_digest(job, profile_name)
+        with self._lock:
+            self.stats["requests"] += 1
+            future = self._pending.get(digest)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return future, True
+            future = self._pool.submit(self._render, job, profile_name)
+            self._pending[digest] = future
+
+        def forget(_):
+            with self._lock:
+                if self._pending.get(digest) is future:
+                    del self._pending[digest]
+            if future.exception() is not None:
+                self._count("failed")
+
+        future.add_done_callback(forget)
+        return future, False
+
+    def status(self):
+        with self._lock:
+            return dict(self.stats, pending=len(self._pending))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PrpgMapRender/1"
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/status":
+            self.send_json(404, {"error": f"Nieznany adres: {self.path}"})
+            return
+        self.send_json(200, self.server.service.status())
+
+    def do_POST(self):
+        if self.path != "/render":
+            self.send_json(404, {"error": f"Nieznany adres: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_json(400, {"error": "Niepoprawny nagłówek Content-Length"})
+            return
+        if length > MAX_REQUEST_BYTES:
+            self.send_json(413, {"error": "Zlecenie jest za duże"})
+            return
+
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(data, dict):
+                raise ValueError("treść zlecenia musi być obiektem JSON")
+            profile_name = data.pop("profile", DEFAULT_PROFILE)
+            job = RenderJob.from_dict(data)
+            future, coalesced = self.server.service.submit(job, profile_name)
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": f"Niepoprawne zlecenie: {e}"})
+            return
+
+        try:
+            result = future.result()
+            handle = open(result.path, "rb")
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+            return
+
+        with handle:
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPES.get(get_profile(profile_name).format, "application/octet-stream"))
+            self.send_header("Content-Length", str(os.fstat(handle.fileno()).st_size))
+            self.send_header("X-Render-Result", "coalesced" if coalesced else "cached" if result.cached else "rendered")
+            self.end_headers()
+            shutil.copyfileobj(handle, self.wfile, STREAM_CHUNK)
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, port=DEFAULT_PORT):
+        super().__init__((HOST, port), RenderRequestHandler)
+        self.service = service
+
+
+def render_remote(job, output_path, profile_name=DEFAULT_PROFILE, port=DEFAULT_PORT, timeout=600):
+    """
+    Klient usługi: wysyła `job` (RenderJob) do usługi na 127.0.0.1:`port` i
+    zapisuje odebraną mapę do `output_path`. Zwraca wartość X-Render-Result
+    ("rendered", "cached" albo "coalesced").
+    """
+    body = json.dumps(dict(job.to_dict(), profile=profile_name)).encode("utf-8")
+    connection = http.client.HTTPConnection(HOST, port, timeout=timeout)
+    try:
+        connection.request("POST", "/render", body, {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        if response.status != 200:
+            message = response.read().decode("utf-8", "replace")
+            try:
+                message = json.loads(message)["error"]
+            except (ValueError, KeyError):
+                pass
+            raise RuntimeError(f"Usługa zwróciła błąd {response.status}: {message}")
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "wb") as f:
+            shutil.copyfileobj(response, f, STREAM_CHUNK)
+        return response.getheader("X-Render-Result")
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokalna usługa HTTP renderująca mapy (127.0.0.1).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port usługi")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Liczba równoległych renderowań")
+    parser.add_argument("--client", metavar="SETTINGS",
+                        help="Zamiast uruchamiać usługę, wyślij do niej plik ustawień i zapisz mapę (-o)")
+    parser.add_argument("-o", "--output", default="mapa.png", help="Plik wynikowy w trybie --client")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Profil zapisu w trybie --client")
+    args = parser.parse_args(argv)
+
+    if args.client:
+        outcome = render_remote(load_job(args.client), args.output, args.profile, args.port)
+        print(f"Zapisano: {args.output} ({outcome})")
+        return 0
+
+    service = RenderService(workers=args.workers)
+    server = RenderServer(service, args.port)
+    print(f"Usługa renderowania: http://{HOST}:{args.port}/render (Ctrl+C kończy)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
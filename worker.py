@@ -0,0 +1,99 @@
+"""
+Uruchamianie renderowania w tle (QThreadPool), żeby okno nie zamarzało
+podczas generowania dużych map.
+"""
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class RenderSignals(QObject):
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class RenderTask(QRunnable):
+    """
+    Zadanie wykonujące `work(progress, is_cancelled)` w wątku z puli.
+    Wynik, błąd albo przerwanie są zgłaszane sygnałami w `self.signals`.
+    """
+    def __init__(self, work):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.work = work
+        self.signals = RenderSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        # Import w wątku zadania, nie przy starcie okna (renderery wczytują Pillow)
+        from renderers.pipeline import RenderCancelled
+        try:
+            result = self.work(self.signals.progress.emit, self.is_cancelled)
+        except RenderCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.finished.emit(result)
+
+
+class RenderQueue(QObject):
+    """
+    Kolejka z jednym aktywnym zadaniem. Zlecenie w trakcie renderowania nie
+    uruchamia kolejnego, tylko zastępuje oczekujące - po zakończeniu bieżącego
+    wykonywane jest najnowsze zlecenie (wcześniejsze są łączone w jedno).
+    """
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    queued = pyqtSignal()
+
+    def __init__(self, pool=None, parent=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.current_task = None
+        self.pending_work = None
+
+    def is_busy(self):
+        return self.current_task is not None
+
+    def submit(self, work):
+        if self.current_task is not None:
+            self.pending_work = work
+            self.queued.emit()
+            return
+        self._start(work)
+
+    def cancel(self):
+        self.pending_work = None
+        if self.current_task is not None:
+            self.current_task.cancel()
+
+    def _start(self, work):
+        task = RenderTask(work)
+        task.signals.progress.connect(self.progress)
+        task.signals.finished.connect(lambda result: self._done(self.finished.emit, result))
+        task.signals.failed.connect(lambda message: self._done(self.failed.emit, message))
+        task.signals.cancelled.connect(lambda: self._done(lambda _: self.cancelled.emit(), None))
+        self.current_task = task
+        self.pool.start(task)
+
+    def _done(self, emit, value):
+        self.current_task = None
+        # Najpierw uruchamiamy oczekujące zlecenie, żeby odbiorca sygnału
+        # widział w is_busy(), że nadchodzi nowszy wynik
+        if self.pending_work is not None:
+            work, self.pending_work = self.pending_work, None
+            self._start(work)
+        emit(value)